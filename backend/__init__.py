@@ -6,9 +6,12 @@ from .api.login import login
 from .api.auth_google import auth_google
 from .api.auth_google_callback import auth_google_callback
 from .api.generate_questions import generate_questions
+from .api.stream_questions import stream_questions
 from .api.evaluate_answers import evaluate_answers
 from .api.generate_voice_interview_questions import generate_voice_interview_questions
 from .api.process_voice_answer import process_voice_answer
 from .api.evaluate_voice_interview import evaluate_voice_interview
+from .api.voice_interview_session import voice_interview_session
 from .api.analyze_cv import analyze_cv
 from .api.startup_cleanup import startup_cleanup
+from .api.question_bank_refill import question_bank_refill
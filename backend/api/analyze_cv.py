@@ -1,15 +1,12 @@
 
 from fastapi import HTTPException, UploadFile, File
-import google.generativeai as genai
-import os
-import json
 
-from backend import schemas
+from backend import schemas, llm
 from backend.api.cv_parser_utils import extract_text_from_pdf, extract_text_from_docx
 
 async def analyze_cv(cv: UploadFile = File(...)):
     """Analyze uploaded CV and provide detailed feedback"""
-    if not os.getenv("GEMINI_API_KEY"):
+    if not llm.is_configured():
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
     # Validate file type
@@ -33,9 +30,6 @@ async def analyze_cv(cv: UploadFile = File(...)):
     if not cv_text:
         raise HTTPException(status_code=400, detail="Could not extract text from CV")
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-flash')
-
     prompt = f"""
     Analyze the following CV and provide detailed feedback. Return your analysis as a JSON object with the following structure:
 
@@ -70,17 +64,8 @@ async def analyze_cv(cv: UploadFile = File(...)):
     """
 
     try:
-        response = model.generate_content(prompt)
-        text_response = response.text
-        
-        if '```json' in text_response:
-            json_start = text_response.find('```json') + 7
-            json_end = text_response.find('```', json_start)
-            json_str = text_response[json_start:json_end].strip()
-        else:
-            json_str = text_response
-        
-        analysis = json.loads(json_str)
+        text_response = await llm.generate_text(prompt)
+        analysis = llm.extract_json(text_response)
         return analysis
     except Exception as e:
         print(f"Error analyzing CV: {e}")
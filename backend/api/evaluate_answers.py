@@ -1,24 +1,44 @@
 from fastapi import HTTPException
-import google.generativeai as genai
-import os
-import json
+import asyncio
+import string
 
-from backend import schemas
+from backend import schemas, llm
 
-async def evaluate_answers(request: schemas.EvaluateRequest):
-    """Evaluate text-based interview answers"""
-    if not os.getenv("GEMINI_API_KEY"):
-        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+MCQ_CORRECT_SCORE = 10
+MCQ_INCORRECT_SCORE = 1
+# Used when the LLM returns fewer evaluations than there were open-ended answers
+MISSING_EVALUATION = {"score": 0, "feedback": "This answer could not be evaluated."}
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-flash')
+def is_mcq(question) -> bool:
+    """MCQs carry their options and correct answer, so they can be graded locally"""
+    return isinstance(question, dict) and bool(question.get("options")) and bool(question.get("answer"))
 
-    # Format questions and answers for prompt
+def _normalize_option(value, options) -> str:
+    value = " ".join(str(value or "").split()).lower()
+    # Accept a bare option letter ("B", "b)") as well as the option text
+    letter = value.rstrip(").:").strip()
+    if len(letter) == 1 and letter in string.ascii_lowercase:
+        index = string.ascii_lowercase.index(letter)
+        if index < len(options):
+            return " ".join(str(options[index]).split()).lower()
+    return value
+
+def grade_mcq(question: dict, answer: str) -> dict:
+    options = question["options"]
+    correct = _normalize_option(question["answer"], options) == _normalize_option(answer, options)
+    if correct:
+        return {"score": MCQ_CORRECT_SCORE, "feedback": "Correct."}
+    if not str(answer or "").strip():
+        return {"score": MCQ_INCORRECT_SCORE, "feedback": f"Not answered. The correct answer is: {question['answer']}"}
+    return {"score": MCQ_INCORRECT_SCORE, "feedback": f"Incorrect. The correct answer is: {question['answer']}"}
+
+async def evaluate_open_ended(items) -> list:
+    """Score open-ended (question, answer) pairs with one LLM call"""
     qa_pairs = "\n\n".join([
-        f"Q{i+1}: {q['question']}\nOptions: {q['options']}\nCorrect Answer: {q['answer']}\nUser's Answer: {a}"
-        if isinstance(q, dict) else
-        f"Q{i+1}: {q}\nA{i+1}: {a}" 
-        for i, (q, a) in enumerate(zip(request.questions, request.answers))
+        f"Q{i+1}: {q['question']}\nReference Answer: {q['answer']}\nA{i+1}: {a}"
+        if isinstance(q, dict) and q.get("answer") else
+        f"Q{i+1}: {q['question'] if isinstance(q, dict) else q}\nA{i+1}: {a}"
+        for i, (q, a) in enumerate(items)
     ])
 
     prompt = f"""
@@ -30,20 +50,62 @@ async def evaluate_answers(request: schemas.EvaluateRequest):
     {qa_pairs}
     """
 
-    try:
-        response = model.generate_content(prompt)
-        text_response = response.text
-        
-        if '```json' in text_response:
-            json_start = text_response.find('```json') + 7
-            json_end = text_response.find('```', json_start)
-            json_str = text_response[json_start:json_end].strip()
+    text_response = await llm.generate_text(prompt)
+    return llm.extract_json(text_response)
+
+async def explain_mcqs(items) -> list:
+    """Produce a short explanation per MCQ in a single batched LLM call"""
+    qa_pairs = "\n\n".join([
+        f"Q{i+1}: {q['question']}\nOptions: {q['options']}\nCorrect Answer: {q['answer']}\nUser's Answer: {a}"
+        for i, (q, a) in enumerate(items)
+    ])
+
+    prompt = f"""
+    For each multiple choice question below, briefly explain why the correct answer is correct.
+    Return the result as a JSON array of strings, one explanation per question, in the same order.
+
+    {qa_pairs}
+    """
+
+    text_response = await llm.generate_text(prompt)
+    return llm.extract_json(text_response)
+
+async def evaluate_answers(request: schemas.EvaluateRequest):
+    """Evaluate text-based interview answers"""
+    pairs = list(zip(request.questions, request.answers))
+    mcq_indexes = [i for i, (q, _) in enumerate(pairs) if is_mcq(q)]
+    open_indexes = [i for i, (q, _) in enumerate(pairs) if not is_mcq(q)]
+    explain = request.explain and bool(mcq_indexes)
+
+    if (open_indexes or explain) and not llm.is_configured():
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+
+    # MCQs are graded locally and deterministically
+    evaluation = [None] * len(pairs)
+    for i in mcq_indexes:
+        evaluation[i] = grade_mcq(*pairs[i])
+
+    calls = []
+    if open_indexes:
+        calls.append(evaluate_open_ended([pairs[i] for i in open_indexes]))
+    if explain:
+        calls.append(explain_mcqs([pairs[i] for i in mcq_indexes]))
+    # The explanations are optional; only a failed open-ended evaluation fails the request
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    if open_indexes:
+        scores = results[0]
+        if isinstance(scores, Exception) or not isinstance(scores, list):
+            print(f"Error evaluating answers: {scores}")
+            raise HTTPException(status_code=500, detail="Failed to evaluate answers")
+        for n, i in enumerate(open_indexes):
+            evaluation[i] = scores[n] if n < len(scores) and isinstance(scores[n], dict) else dict(MISSING_EVALUATION)
+    if explain:
+        explanations = results[-1]
+        if isinstance(explanations, Exception) or not isinstance(explanations, list):
+            print(f"Error explaining MCQ answers: {explanations}")
         else:
-            json_str = text_response
-        
-        evaluation = json.loads(json_str)
-        return evaluation
-    except Exception as e:
-        print(f"Error evaluating answers: {e}")
-        raise HTTPException(status_code=500, detail="Failed to evaluate answers")
+            for i, explanation in zip(mcq_indexes, explanations):
+                evaluation[i]["feedback"] = f"{evaluation[i]['feedback']} {explanation}"
 
+    return evaluation
@@ -1,66 +1,55 @@
 from fastapi import HTTPException
-import google.generativeai as genai
-import os
-import json
 
-from backend import schemas
+from backend import schemas, llm
 
-async def evaluate_voice_interview(request: schemas.VoiceInterviewEvaluationRequest):
-    """Generate overall evaluation for voice interview"""
-    if not os.getenv("GEMINI_API_KEY"):
-        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+async def build_interview_evaluation(request: schemas.VoiceInterviewEvaluationRequest):
+    """Combine per-answer evaluations into the overall interview evaluation"""
+    total_score = sum(eval.score for eval in request.evaluations)
+    overall_score = total_score / len(request.evaluations) if request.evaluations else 0
 
-    try:
-        total_score = sum(eval.score for eval in request.evaluations)
-        overall_score = total_score / len(request.evaluations) if request.evaluations else 0
+    feedback_parts = []
+    for i, eval in enumerate(request.evaluations):
+        feedback_parts.append(
+            f"Q{i+1}: {request.questions[i]}\n"
+            f"Score: {eval.score}/10\n"
+            f"Feedback: {eval.feedback}\n"
+        )
 
-        feedback_parts = []
-        for i, eval in enumerate(request.evaluations):
-            feedback_parts.append(
-                f"Q{i+1}: {request.questions[i]}\n"
-                f"Score: {eval.score}/10\n"
-                f"Feedback: {eval.feedback}\n"
-            )
-        
-        full_feedback = "\n---\n".join(feedback_parts)
+    full_feedback = "\n---\n".join(feedback_parts)
 
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        model = genai.GenerativeModel('gemini-2.5-flash')
+    overall_prompt = f"""
+    Based on the interview performance below, provide:
+    1. Overall feedback (2-3 sentences)
+    2. 3-5 specific recommendations for improvement
 
-        overall_prompt = f"""
-        Based on the interview performance below, provide:
-        1. Overall feedback (2-3 sentences)
-        2. 3-5 specific recommendations for improvement
-        
-        Return as JSON with "overall_feedback" (string) and "recommendations" (array) fields.
+    Return as JSON with "overall_feedback" (string) and "recommendations" (array) fields.
 
-        Performance Summary (Overall Score: {overall_score:.1f}/10):
-        {full_feedback}
-        """
+    Performance Summary (Overall Score: {overall_score:.1f}/10):
+    {full_feedback}
+    """
 
-        response = model.generate_content(overall_prompt)
-        text_response = response.text
-        
-        if '```json' in text_response:
-            json_start = text_response.find('```json') + 7
-            json_end = text_response.find('```', json_start)
-            json_str = text_response[json_start:json_end].strip()
-        else:
-            json_str = text_response
-        
-        overall_evaluation = json.loads(json_str)
+    text_response = await llm.generate_text(overall_prompt)
+    overall_evaluation = llm.extract_json(text_response)
 
-        question_scores = [
-            {"name": f"Q{i+1}", "score": float(eval.score)}
-            for i, eval in enumerate(request.evaluations)
-        ]
+    question_scores = [
+        {"name": f"Q{i+1}", "score": float(eval.score)}
+        for i, eval in enumerate(request.evaluations)
+    ]
 
-        return schemas.VoiceInterviewEvaluationResponse(
-            overall_score=round(overall_score, 2),
-            overall_feedback=overall_evaluation.get("overall_feedback", "No feedback available."),
-            question_scores=question_scores,
-            recommendations=overall_evaluation.get("recommendations", [])
-        )
+    return schemas.VoiceInterviewEvaluationResponse(
+        overall_score=round(overall_score, 2),
+        overall_feedback=overall_evaluation.get("overall_feedback", "No feedback available."),
+        question_scores=question_scores,
+        recommendations=overall_evaluation.get("recommendations", [])
+    )
+
+async def evaluate_voice_interview(request: schemas.VoiceInterviewEvaluationRequest):
+    """Generate overall evaluation for voice interview"""
+    if not llm.is_configured():
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
+
+    try:
+        return await build_interview_evaluation(request)
     except Exception as e:
         print(f"Error evaluating voice interview: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to evaluate: {str(e)}")
@@ -1,15 +1,10 @@
 
 from fastapi import HTTPException
-import google.generativeai as genai
-import json
 
-from backend import schemas
+from backend import schemas, llm, question_cache, question_bank
 
-async def generate_questions(request: schemas.InterviewRequest):
-    """Generate interview questions for text-based interview"""
-    model = genai.GenerativeModel('gemini-2.5-flash')
-
-    prompt = f"""
+def build_questions_prompt(request: schemas.InterviewRequest) -> str:
+    return f"""
     Generate {request.numberOfQuestions} interview questions for a {request.role} candidate applying for a {request.position} position.
     
     Question Type Focus: {request.questionType}
@@ -31,18 +26,21 @@ async def generate_questions(request: schemas.InterviewRequest):
     Return the questions as a JSON array of objects. Each object should have 'question', 'options' (an array of strings), and 'answer' (the correct option string) fields.
     """
 
+async def generate_questions(request: schemas.InterviewRequest):
+    """Generate interview questions for text-based interview"""
+    prompt = build_questions_prompt(request)
+
+    async def generate():
+        text_response = await llm.generate_text(prompt)
+        questions = llm.extract_json(text_response)
+        await question_bank.deposit(request, questions)
+        return questions
+
     try:
-        response = model.generate_content(prompt)
-        text_response = response.text
-        
-        if '```json' in text_response:
-            json_start = text_response.find('```json') + 7
-            json_end = text_response.find('```', json_start)
-            json_str = text_response[json_start:json_end].strip()
-        else:
-            json_str = text_response
-        
-        questions = json.loads(json_str)
+        # Warm buckets are served straight from the bank; cold ones fall back to the cache/LLM
+        questions = await question_bank.take(request)
+        if questions is None:
+            questions = await question_cache.get_or_generate("text", request, generate)
         return questions
     except Exception as e:
         print(f"Error generating questions: {e}")
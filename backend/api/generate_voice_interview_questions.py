@@ -1,19 +1,13 @@
 
 from fastapi import HTTPException
-import google.generativeai as genai
-import os
-import json
 
-from backend import schemas
+from backend import schemas, llm, question_cache
 
 async def generate_voice_interview_questions(request: schemas.InterviewRequest):
     """Generate voice-optimized interview questions"""
-    if not os.getenv("GEMINI_API_KEY"):
+    if not llm.is_configured():
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-flash')
-
     prompt = f"""
     Generate {request.numberOfQuestions} concise interview questions for a {request.role} candidate applying for a {request.position} position.
     
@@ -36,18 +30,12 @@ async def generate_voice_interview_questions(request: schemas.InterviewRequest):
     Return the questions as a JSON array of strings.
     """
 
+    async def generate():
+        text_response = await llm.generate_text(prompt)
+        return llm.extract_json(text_response)
+
     try:
-        response = model.generate_content(prompt)
-        text_response = response.text
-        
-        if '```json' in text_response:
-            json_start = text_response.find('```json') + 7
-            json_end = text_response.find('```', json_start)
-            json_str = text_response[json_start:json_end].strip()
-        else:
-            json_str = text_response
-        
-        questions = json.loads(json_str)
+        questions = await question_cache.get_or_generate("voice", request, generate)
         return questions
     except Exception as e:
         print(f"Error generating voice interview questions: {e}")
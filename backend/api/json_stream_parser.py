@@ -0,0 +1,103 @@
+import json
+
+JSON_FENCE = "```json"
+
+class JSONArrayStreamParser:
+    """Incrementally extracts complete elements from a streamed top-level JSON array.
+
+    The array starts after a ```json fence if there is one, otherwise at the
+    first '[' followed by '{' or '"', so brackets in any preamble text are
+    skipped. Objects, arrays and strings are returned as soon as their closing
+    character arrives.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element_start = None
+        self.done = False
+
+    def _emit(self, end: int, items: list):
+        raw = self._buffer[self._element_start:end].strip()
+        if raw:
+            items.append(json.loads(raw))
+        self._buffer = self._buffer[end:]
+        self._pos = 0
+        self._element_start = None
+
+    def _find_start(self):
+        """Index of the array's opening '[' in the buffer, or None to wait for more text"""
+        fence = self._buffer.find(JSON_FENCE)
+        if fence != -1:
+            start = self._buffer.find('[', fence + len(JSON_FENCE))
+            return start if start != -1 else None
+        start = self._buffer.find('[')
+        while start != -1:
+            rest = self._buffer[start + 1:].lstrip()
+            if not rest:
+                return None  # Can't tell what follows yet
+            if rest[0] in '{"':
+                return start
+            start = self._buffer.find('[', start + 1)
+        return None
+
+    def feed(self, text: str) -> list:
+        """Add a chunk of model output and return any elements it completed"""
+        self._buffer += text
+        items = []
+        if not self._started:
+            start = self._find_start()
+            if start is None:
+                return items
+            self._started = True
+            self._buffer = self._buffer[start + 1:]
+            self._pos = 0
+
+        while self._pos < len(self._buffer) and not self.done:
+            ch = self._buffer[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._emit(self._pos, items)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 0 and self._element_start is None:
+                    self._element_start = self._pos - 1
+            elif ch in '{[':
+                if self._depth == 0 and self._element_start is None:
+                    self._element_start = self._pos - 1
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    # Closing bracket of the top-level array
+                    if self._element_start is not None:
+                        self._emit(self._pos - 1, items)
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(self._pos, items)
+            elif self._depth == 0:
+                if ch == ',':
+                    if self._element_start is not None:
+                        self._emit(self._pos - 1, items)
+                    else:
+                        self._buffer = self._buffer[self._pos:]
+                        self._pos = 0
+                elif not ch.isspace() and self._element_start is None:
+                    # Bare scalar (number, true/false/null)
+                    self._element_start = self._pos - 1
+        return items
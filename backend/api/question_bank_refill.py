@@ -0,0 +1,40 @@
+
+import asyncio
+import os
+
+from backend import llm, question_bank
+from backend.api.generate_questions import build_questions_prompt
+
+QUESTION_BANK_REFILL_INTERVAL = int(os.getenv("QUESTION_BANK_REFILL_INTERVAL", "60"))
+QUESTION_BANK_POPULAR_BUCKETS = int(os.getenv("QUESTION_BANK_POPULAR_BUCKETS", "20"))
+QUESTION_BANK_BATCH_SIZE = int(os.getenv("QUESTION_BANK_BATCH_SIZE", "10"))
+
+async def refill_bucket(bucket: str, request):
+    """Top up one bucket to the minimum inventory using the /generate-questions prompt"""
+    stock = await asyncio.to_thread(question_bank.inventory, bucket)
+    while stock < question_bank.QUESTION_BANK_MIN_INVENTORY:
+        batch_request = request.model_copy(update={"numberOfQuestions": QUESTION_BANK_BATCH_SIZE})
+        text_response = await llm.generate_text(build_questions_prompt(batch_request))
+        questions = llm.extract_json(text_response)
+        if not isinstance(questions, list) or not questions:
+            break
+        added = await question_bank.deposit(batch_request, questions)
+        if not added:
+            break  # Nothing new (all duplicates, or the deposit failed); try again next round
+        stock += added
+        print(f"Question bank: refilled '{bucket}' to {stock} questions")
+
+async def question_bank_refill():
+    """Keep popular question-bank buckets stocked in the background"""
+
+    async def refill_popular_buckets():
+        while True:
+            await asyncio.sleep(QUESTION_BANK_REFILL_INTERVAL)
+            for bucket, request in question_bank.popular_buckets(QUESTION_BANK_POPULAR_BUCKETS):
+                try:
+                    await refill_bucket(bucket, request)
+                except Exception as e:
+                    print(f"Question bank refill failed for '{bucket}': {e}")
+
+    if question_bank.QUESTION_BANK_ENABLED and llm.is_configured():
+        asyncio.create_task(refill_popular_buckets())
@@ -1,24 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import google.generativeai as genai
-import os
 import json
 import re
 
-from backend import schemas
+from backend import schemas, llm
 from backend.database import get_db
 
 router = APIRouter()
 
 @router.post("/generate-roadmap")
 async def generate_roadmap(request: schemas.RoadmapRequest, db: Session = Depends(get_db)):
-    if not os.getenv("GEMINI_API_KEY"):
+    if not llm.is_configured():
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-flash')
-
     prompt = f"""
     Create a detailed interview preparation roadmap for: '{request.query}'
     
@@ -43,8 +38,7 @@ async def generate_roadmap(request: schemas.RoadmapRequest, db: Session = Depend
     """
 
     try:
-        response = model.generate_content(prompt)
-        text_response = response.text.strip()
+        text_response = (await llm.generate_text(prompt)).strip()
         
         # Remove markdown code blocks if present
         json_str = re.sub(r'^```(?:json)?\n?', '', text_response)
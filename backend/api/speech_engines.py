@@ -0,0 +1,109 @@
+
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+import speech_recognition as sr
+
+# Speech-to-text engines. Each takes 16-bit mono PCM and returns text.
+# Engines are created once per worker process and kept warm; select the
+# primary engine with TRANSCRIBE_ENGINE and a fallback with
+# TRANSCRIBE_FALLBACK_ENGINE (empty to disable).
+
+TRANSCRIBE_ENGINE = os.getenv("TRANSCRIBE_ENGINE", "google")  # 'google' or 'whisper'
+TRANSCRIBE_FALLBACK_ENGINE = os.getenv("TRANSCRIBE_FALLBACK_ENGINE", "google")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base.en")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "2"))
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+
+class TranscriptionEngine(ABC):
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        """Return the text spoken in 16-bit mono PCM audio"""
+
+class GoogleSpeechEngine(TranscriptionEngine):
+    """speech_recognition's free Google Web Speech endpoint (network call)"""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        audio = sr.AudioData(pcm, sample_rate, 2)
+        return self.recognizer.recognize_google(audio)
+
+class WhisperEngine(TranscriptionEngine):
+    """Offline CPU transcription with faster-whisper (optional dependency)"""
+    name = "whisper"
+
+    def __init__(self):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(
+            WHISPER_MODEL_SIZE,
+            device="cpu",
+            compute_type=WHISPER_COMPUTE_TYPE,
+            cpu_threads=WHISPER_CPU_THREADS,
+        )
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        if sample_rate != 16000:
+            raise ValueError("Whisper engine expects 16 kHz audio")
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(audio, language=WHISPER_LANGUAGE, beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+ENGINES = {
+    GoogleSpeechEngine.name: GoogleSpeechEngine,
+    WhisperEngine.name: WhisperEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(name: str) -> TranscriptionEngine:
+    """Return this process's instance of engine `name`, loading it on first use"""
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                if name not in ENGINES:
+                    raise ValueError(f"Unknown transcription engine: {name}")
+                engine = ENGINES[name]()
+                _engines[name] = engine
+                print(f"Loaded transcription engine: {name}")
+    return engine
+
+def engine_chain() -> list:
+    chain = [TRANSCRIBE_ENGINE]
+    if TRANSCRIBE_FALLBACK_ENGINE and TRANSCRIBE_FALLBACK_ENGINE != TRANSCRIBE_ENGINE:
+        chain.append(TRANSCRIBE_FALLBACK_ENGINE)
+    return chain
+
+def warm_up():
+    """Load the configured engines so the first request doesn't pay for it"""
+    for name in engine_chain():
+        try:
+            get_engine(name)
+        except Exception as e:
+            print(f"Could not load transcription engine '{name}': {e}")
+
+def transcribe_pcm(pcm: bytes, sample_rate: int) -> str:
+    """Transcribe with the primary engine, falling back if it fails or hears nothing"""
+    last_error = None
+    for name in engine_chain():
+        try:
+            text = get_engine(name).transcribe(pcm, sample_rate)
+            if text:
+                return text
+        except Exception as e:
+            print(f"Transcription engine '{name}' failed: {e}")
+            last_error = e
+    if last_error:
+        raise last_error
+    return ""
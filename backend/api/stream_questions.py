@@ -0,0 +1,47 @@
+
+from fastapi.responses import StreamingResponse
+import json
+
+from backend import schemas, llm, question_cache, question_bank
+from backend.api.generate_questions import build_questions_prompt
+from backend.api.json_stream_parser import JSONArrayStreamParser
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def question_events(request: schemas.InterviewRequest):
+    """Yield one SSE 'question' event per question, as soon as each is available"""
+    try:
+        questions = await question_bank.take(request)
+        source = "bank"
+        if questions is None:
+            questions = await question_cache.lookup("text", request)
+            source = "cache"
+
+        if questions is not None:
+            for index, question in enumerate(questions):
+                yield sse_event("question", {"index": index, "question": question})
+            yield sse_event("done", {"count": len(questions), "source": source})
+            return
+
+        parser = JSONArrayStreamParser()
+        questions = []
+        async for chunk in llm.stream_text(build_questions_prompt(request)):
+            for question in parser.feed(chunk):
+                yield sse_event("question", {"index": len(questions), "question": question})
+                questions.append(question)
+
+        await question_cache.store("text", request, questions)
+        await question_bank.deposit(request, questions)
+        yield sse_event("done", {"count": len(questions), "source": "llm"})
+    except Exception as e:
+        print(f"Error streaming questions: {e}")
+        yield sse_event("error", {"detail": "Failed to generate questions"})
+
+async def stream_questions(request: schemas.InterviewRequest):
+    """Stream text-interview questions as Server-Sent Events"""
+    return StreamingResponse(
+        question_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
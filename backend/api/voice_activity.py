@@ -0,0 +1,52 @@
+
+import os
+
+import numpy as np
+
+# Energy-based voice activity detection on 16-bit mono PCM. Leading and
+# trailing silence is dropped and long pauses are shortened before the audio
+# reaches the recognizer.
+
+VAD_FRAME_MS = 30
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "150"))  # Audio kept either side of speech
+VAD_MAX_PAUSE_MS = int(os.getenv("VAD_MAX_PAUSE_MS", "600"))  # Longer pauses are collapsed to this
+VAD_ENERGY_RATIO = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))  # Speech threshold over the noise floor
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))
+
+def trim_silence(pcm: bytes, sample_rate: int):
+    """Return (trimmed_pcm, speech_ratio) where speech_ratio is speech frames / total frames"""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = sample_rate * VAD_FRAME_MS // 1000
+    frame_count = len(samples) // frame_len
+    if frame_count == 0:
+        return pcm, 0.0
+
+    frames = samples[:frame_count * frame_len].reshape(frame_count, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    noise_floor = np.percentile(rms, 10)
+    speech = rms > max(VAD_MIN_RMS, noise_floor * VAD_ENERGY_RATIO)
+    speech_ratio = float(speech.mean())
+    if not speech.any():
+        return b"", 0.0
+
+    # Keep a little padding around speech so word edges aren't clipped
+    pad = VAD_PADDING_MS // VAD_FRAME_MS
+    keep = np.convolve(speech.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+
+    # Drop leading/trailing silence and cap every remaining pause
+    max_pause = max(1, VAD_MAX_PAUSE_MS // VAD_FRAME_MS)
+    speech_indexes = np.flatnonzero(keep)
+    first, last = speech_indexes[0], speech_indexes[-1]
+    selected = []
+    pause = 0
+    for i in range(first, last + 1):
+        if keep[i]:
+            pause = 0
+            selected.append(i)
+        else:
+            pause += 1
+            if pause <= max_pause:
+                selected.append(i)
+
+    trimmed = frames[selected].astype(np.int16).tobytes()
+    return trimmed, speech_ratio
@@ -0,0 +1,298 @@
+
+import asyncio
+import json
+import os
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from backend import schemas, llm
+from backend.api.transcribe_audio import (
+    transcribe_audio_async, transcribe_decoded_async, transcription_pool, StreamingDecoder,
+    TRANSCRIBE_MAX_UPLOAD_BYTES, TRANSCRIBE_ERROR_TEXT, SAMPLE_RATE,
+)
+from backend.api.process_voice_answer import evaluate_voice_answer
+from backend.api.evaluate_voice_interview import build_interview_evaluation
+from backend.compony_api.tts_routes import synthesize_speech_async
+from backend.workers import PoolBusyError
+
+# Full-duplex voice interview over one WebSocket. Per-question state lives on
+# the server, so a turn is: audio chunks stream in -> transcript + evaluation
+# go out -> next question text and its audio are pushed straight back.
+#
+# Client -> server:
+#   {"type": "start", "questions": [...], "tts": true}
+#   binary frames                 audio chunks of the current answer (webm/ogg/...)
+#   {"type": "answer_end"}        the candidate stopped speaking; resend it after an error
+#   {"type": "end"}               finish early and return the summary
+# Server -> client:
+#   {"type": "question", "index", "text", "follow_up"} then one binary MP3 frame when tts is on
+#   {"type": "partial_transcript", "text"} while the answer is still streaming
+#   {"type": "transcript", "text", "speech_ratio"}
+#   {"type": "evaluation", "score", "feedback", "follow_up_question"}
+#   {"type": "summary", ...VoiceInterviewEvaluationResponse}
+#   {"type": "error", "detail"}  the turn failed; the session and the answer are kept
+
+VOICE_SESSION_PARTIALS = os.getenv("VOICE_SESSION_PARTIALS", "true").lower() == "true"
+VOICE_SESSION_PARTIAL_INTERVAL = float(os.getenv("VOICE_SESSION_PARTIAL_INTERVAL", "3"))
+# Partials are incremental: the answer is decoded as it streams in and each
+# partial only transcribes the audio since the previous one. They are skipped
+# while the transcription pool has a backlog, so final transcripts go first.
+PARTIAL_MIN_PCM_BYTES = SAMPLE_RATE * 2  # At least a second of new audio
+
+def question_text(question) -> str:
+    if isinstance(question, dict):
+        return str(question.get("question") or question.get("text") or question)
+    return str(question)
+
+class VoiceInterviewSession:
+    def __init__(self, websocket: WebSocket, questions: list, tts: bool = True):
+        self.websocket = websocket
+        self.initial_questions = questions
+        self.tts = tts
+        self.asked = []
+        self.evaluations = []
+        self.current_question = None
+        self.audio = bytearray()
+        self.decoder = None  # Streaming decoder for the current answer, when partials are on
+        self.partial_task = None
+        self.partial_sent_at = 0.0
+        self.partial_offset = 0  # Decoded PCM bytes already covered by partials
+        self.partial_text = ""
+        self.answer_ended = False  # answer_end received but the answer not yet evaluated
+        self.answer_pcm = None  # Decoded answer, kept until it is evaluated
+        self.transcription = None
+        self.send_lock = asyncio.Lock()
+
+    @property
+    def index(self) -> int:
+        return len(self.asked) - 1
+
+    async def send_json(self, data: dict):
+        async with self.send_lock:
+            await self.websocket.send_json(data)
+
+    async def ask(self, text: str, follow_up: bool = False):
+        """Push the question text immediately, then its synthesized audio"""
+        self.current_question = text
+        self.asked.append(text)
+        self.reset_answer()
+        await self.send_json({"type": "question", "index": self.index, "text": text, "follow_up": follow_up})
+        if self.tts:
+            try:
+                audio = await synthesize_speech_async(text)
+                async with self.send_lock:
+                    await self.websocket.send_bytes(audio)
+            except Exception as e:
+                print(f"Voice session TTS error: {e}")
+
+    def reset_answer(self):
+        self.cancel_partial()
+        if self.decoder is not None:
+            self.decoder.close()
+            self.decoder = None
+        self.audio.clear()
+        self.partial_offset = 0
+        self.partial_text = ""
+        self.answer_ended = False
+        self.answer_pcm = None
+        self.transcription = None
+
+    async def add_audio(self, chunk: bytes) -> bool:
+        if len(self.audio) + len(chunk) > TRANSCRIBE_MAX_UPLOAD_BYTES:
+            return False
+        self.audio.extend(chunk)
+        if self.answer_ended:
+            # More audio after a failed answer_end; the whole answer is decoded again
+            self.answer_pcm = None
+            self.transcription = None
+            return True
+        if VOICE_SESSION_PARTIALS:
+            if self.decoder is None:
+                self.decoder = StreamingDecoder()
+                try:
+                    await self.decoder.start()
+                except Exception as e:
+                    print(f"Voice session streaming decoder error: {e}")
+                    self.decoder.failed = True
+            if not self.decoder.failed:
+                await self.decoder.feed(chunk)
+                self.maybe_start_partial()
+        return True
+
+    def maybe_start_partial(self):
+        if self.partial_task is not None or transcription_pool.queue_depth > 0:
+            return
+        loop = asyncio.get_running_loop()
+        if loop.time() - self.partial_sent_at < VOICE_SESSION_PARTIAL_INTERVAL:
+            return
+        decoded = len(self.decoder.pcm)
+        if decoded - self.partial_offset < PARTIAL_MIN_PCM_BYTES:
+            return
+        self.partial_sent_at = loop.time()
+        pcm = bytes(self.decoder.pcm[self.partial_offset:decoded])
+        self.partial_offset = decoded
+        self.partial_task = asyncio.create_task(self.send_partial(pcm))
+
+    async def send_partial(self, pcm: bytes):
+        """Transcribe the newly decoded audio and send the running partial transcript"""
+        try:
+            transcription = await transcribe_decoded_async(pcm)
+            if transcription["text"] and transcription["text"] != TRANSCRIBE_ERROR_TEXT:
+                self.partial_text = f"{self.partial_text} {transcription['text']}".strip()
+                await self.send_json({"type": "partial_transcript", "index": self.index, "text": self.partial_text})
+        except PoolBusyError:
+            pass  # Partials are best effort; the final transcript still runs
+        except Exception as e:
+            print(f"Voice session partial transcript error: {e}")
+        finally:
+            if self.partial_task is asyncio.current_task():
+                self.partial_task = None
+
+    def cancel_partial(self):
+        if self.partial_task is not None:
+            self.partial_task.cancel()
+            self.partial_task = None
+
+    async def transcribe_answer(self) -> dict:
+        """Transcribe the current answer, reusing the result when answer_end is resent"""
+        self.cancel_partial()
+        self.answer_ended = True
+        if self.decoder is not None:
+            # The streamed answer is already (mostly) decoded; only fall back to a
+            # full decode if the streaming decoder wasn't used or failed
+            decoder, self.decoder = self.decoder, None
+            pcm = await decoder.finish() if not decoder.failed else None
+            self.answer_pcm = pcm if pcm and not decoder.failed else None
+        if self.transcription is None:
+            if self.answer_pcm is not None:
+                transcription = await transcribe_decoded_async(self.answer_pcm)
+            else:
+                transcription = await transcribe_audio_async(bytes(self.audio))
+            self.transcription = {
+                "text": transcription["text"] or "Audio received but could not be transcribed.",
+                "speech_ratio": transcription["speech_ratio"],
+            }
+            await self.send_json({"type": "transcript", "index": self.index, **self.transcription})
+        return self.transcription
+
+    async def finish_answer(self) -> bool:
+        """Transcribe and evaluate the current answer; return True if the interview continues.
+
+        The answer is only discarded once its evaluation succeeds, so after an
+        error the client can resend answer_end.
+        """
+        transcription = await self.transcribe_answer()
+        transcribed_text = transcription["text"]
+        speech_ratio = transcription["speech_ratio"]
+
+        evaluation = await evaluate_voice_answer(
+            self.current_question, transcribed_text, self.index, len(self.initial_questions), speech_ratio
+        )
+        answer = schemas.VoiceAnswerResponse(
+            transcribed_text=transcribed_text,
+            score=float(evaluation.get("score", 5.0)),
+            feedback=evaluation.get("feedback", "No specific feedback provided."),
+            follow_up_question=evaluation.get("follow_up_question", None),
+            speech_ratio=speech_ratio
+        )
+        self.evaluations.append(answer)
+        self.reset_answer()
+        await self.send_json({
+            "type": "evaluation",
+            "index": self.index,
+            "score": answer.score,
+            "feedback": answer.feedback,
+            "follow_up_question": answer.follow_up_question,
+        })
+
+        # Same rule as the HTTP client: keep going only while there is a follow-up
+        if answer.follow_up_question and self.index + 1 < len(self.initial_questions):
+            await self.ask(answer.follow_up_question, follow_up=True)
+            return True
+        self.current_question = None
+        return False
+
+    async def send_summary(self):
+        if not self.evaluations:
+            await self.send_json({"type": "summary", "overall_score": 0, "overall_feedback": "No answers were recorded.",
+                                  "question_scores": [], "recommendations": []})
+            return
+        summary = await build_interview_evaluation(schemas.VoiceInterviewEvaluationRequest(
+            evaluations=self.evaluations, questions=self.asked[:len(self.evaluations)]
+        ))
+        await self.send_json({"type": "summary", **summary.model_dump()})
+
+async def voice_interview_session(websocket: WebSocket):
+    """WebSocket voice interview: streamed answers in, evaluations and next questions out"""
+    await websocket.accept()
+    if not llm.is_configured():
+        await websocket.send_json({"type": "error", "detail": "GEMINI_API_KEY not configured"})
+        await websocket.close()
+        return
+
+    session = None
+    try:
+        start = await websocket.receive_json()
+        questions = start.get("questions") or []
+        if start.get("type") != "start" or not questions:
+            await websocket.send_json({"type": "error", "detail": "Expected a start message with questions"})
+            await websocket.close()
+            return
+
+        session = VoiceInterviewSession(websocket, questions, tts=bool(start.get("tts", True)))
+        await session.ask(question_text(questions[0]))
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes") is not None:
+                if not await session.add_audio(message["bytes"]):
+                    await session.send_json({"type": "error", "detail": "Audio answer is too large"})
+                continue
+
+            try:
+                data = json.loads(message.get("text") or "{}")
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await session.send_json({"type": "error", "detail": "Control messages must be JSON objects"})
+                continue
+
+            # A failed turn is reported and the session kept, as the HTTP flow
+            # fails only the one request; the client resends answer_end or end
+            try:
+                if data.get("type") == "answer_end":
+                    if session.current_question is None:
+                        await session.send_json({"type": "error", "detail": "No question is awaiting an answer"})
+                    elif not await session.finish_answer():
+                        await session.send_summary()
+                        break
+                elif data.get("type") == "end":
+                    await session.send_summary()
+                    break
+                else:
+                    await session.send_json({"type": "error", "detail": f"Unknown message type: {data.get('type')}"})
+            except WebSocketDisconnect:
+                raise
+            except PoolBusyError as e:
+                print(f"Transcription pool busy: {e}")
+                await session.send_json({"type": "error", "detail": "Voice processing is busy, please resend the answer"})
+            except Exception as e:
+                print(f"Voice interview turn error: {e}")
+                await session.send_json({"type": "error", "detail": "Could not process the answer, please resend it"})
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("Voice interview session disconnected")
+    except Exception as e:
+        print(f"Voice interview session error: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        if session is not None:
+            session.reset_answer()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Allow running as `python backend/benchmark_face_detection.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from backend.compony_api import proctoring, face_detectors
+
+# Replays recorded proctoring streams through every face detector backend and
+# detection mode on one core. Reports per-frame latency percentiles,
+# frames/second per core, and agreement with the reference (the original Haar
+# full-resolution path).
+#
+#   python backend/benchmark_face_detection.py recordings/session1/ recordings/session2/
+#   python backend/benchmark_face_detection.py recordings/session1.webm --detectors haar,yunet
+#
+# Each source is a directory of JPEG frames (one stream) or a video file.
+
+def load_frames(source: str, limit: int) -> list:
+    """Return the recorded frames as JPEG bytes, as the proctoring socket receives them"""
+    frames = []
+    if os.path.isdir(source):
+        for path in sorted(Path(source).iterdir()):
+            if path.suffix.lower() in (".jpg", ".jpeg"):
+                frames.append(path.read_bytes())
+                if len(frames) >= limit:
+                    break
+        return frames
+
+    capture = cv2.VideoCapture(source)
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode(".jpg", frame)[1].tobytes())
+    capture.release()
+    return frames
+
+def run_full(stream: list, detector, fps: float) -> tuple:
+    """Full-resolution decode and unbounded scan (the original handler path for Haar)"""
+    boxes, latencies = [], []
+    flag = cv2.IMREAD_COLOR if detector.needs_color else cv2.IMREAD_GRAYSCALE
+    for data in stream:
+        started = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+        box = proctoring.largest_face(proctoring.detect_faces_full(image, detector))
+        latencies.append(time.perf_counter() - started)
+        boxes.append(box)
+    return boxes, latencies
+
+def run_fast(stream: list, detector, fps: float) -> tuple:
+    """Working-resolution decode with ROI tracking, re-scanning on the configured schedule"""
+    full_scan_every = max(1, round(proctoring.PROCTORING_FULL_SCAN_SECONDS * fps))
+    boxes, latencies = [], []
+    box = None
+    for i, data in enumerate(stream):
+        started = time.perf_counter()
+        buffer = np.frombuffer(data, np.uint8)
+        full_width = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8).shape[1] * 8
+        image = proctoring.decode_working_frame(buffer, full_width, detector.needs_color)
+        previous_box = None if i % full_scan_every == 0 else box
+        faces, _ = proctoring.detect_faces_fast(image, previous_box, detector)
+        box = proctoring.largest_face(faces)
+        latencies.append(time.perf_counter() - started)
+        boxes.append(box)
+    return boxes, latencies
+
+MODES = {"full": run_full, "fast": run_fast}
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    union = aw * ah + bw * bh - w * h
+    return w * h / union if union else 0.0
+
+def normalized(box, image_width: int):
+    """Scale a box to a 0-1 frame width so full and working-resolution results compare"""
+    if box is None:
+        return None
+    return tuple(v / image_width for v in box)
+
+def agreement(reference: list, results: list) -> tuple:
+    """(presence agreement, mean IoU where both found a face)"""
+    same = sum((a is None) == (b is None) for a, b in zip(reference, results))
+    overlaps = [iou(a, b) for a, b in zip(reference, results) if a is not None and b is not None]
+    return same / len(reference), (sum(overlaps) / len(overlaps) if overlaps else None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark proctoring face detector backends")
+    parser.add_argument("sources", nargs="+", help="Directories of JPEG frames or video files, one stream each")
+    parser.add_argument("--detectors", default=",".join(face_detectors.DETECTORS),
+                        help="Comma-separated detector backends to compare")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated detection modes")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum frames per stream")
+    parser.add_argument("--fps", type=float, default=proctoring.PROCTORING_MAX_FPS,
+                        help="Analysis rate the frames represent (sets the full re-scan interval)")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # Per-core numbers
+    streams = [stream for stream in (load_frames(source, args.limit) for source in args.sources) if stream]
+    if not streams:
+        print("No frames found")
+        return
+    widths = [[cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE).shape[1] for data in stream]
+              for stream in streams]
+    frame_count = sum(len(stream) for stream in streams)
+
+    runs = []
+    for name in args.detectors.split(","):
+        detector = face_detectors.create_detector(name)
+        if detector.name != name:
+            print(f"Skipping '{name}': it could not be loaded")
+            continue
+        for mode in args.modes.split(","):
+            boxes, latencies = [], []
+            for stream, stream_widths in zip(streams, widths):
+                stream_boxes, stream_latencies = MODES[mode](stream, detector, args.fps)
+                for box, width in zip(stream_boxes, stream_widths):
+                    image_width = width if mode == "full" else min(width, proctoring.PROCTORING_WORK_WIDTH)
+                    boxes.append(normalized(box, image_width))
+                latencies.extend(stream_latencies)
+            runs.append((f"{name}/{mode}", boxes, np.array(latencies) * 1000))
+
+    print(f"Streams: {len(streams)}, frames: {frame_count}, working width {proctoring.PROCTORING_WORK_WIDTH}px")
+    print(f"Reference for agreement: {runs[0][0]}")
+    print(f"{'backend/mode':<14} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'fps/core':>9} "
+          f"{'face %':>7} {'agree':>7} {'IoU':>6}")
+    reference = runs[0][1]
+    for label, boxes, latencies in runs:
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        present, mean_iou = agreement(reference, boxes)
+        face_rate = 100 * sum(box is not None for box in boxes) / len(boxes)
+        iou_text = f"{mean_iou:.2f}" if mean_iou is not None else "-"
+        print(f"{label:<14} {p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {1000 / latencies.mean():>9.1f} "
+              f"{face_rate:>6.1f}% {present:>6.1%} {iou_text:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backend import metrics
+from backend.compony_api import auth
+
+# Outbox for suspicious-activity emails. Proctoring sessions enqueue an alert
+# and carry on; background senders compress the screenshot and deliver it,
+# retrying with exponential backoff. At most one alert per interview is
+# pending: a newer alert replaces the queued one instead of sending twice.
+
+ALERT_SENDERS = int(os.getenv("ALERT_SENDERS", "2"))
+ALERT_MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", "5"))
+ALERT_RETRY_BASE_SECONDS = float(os.getenv("ALERT_RETRY_BASE_SECONDS", "2"))
+ALERT_SCREENSHOT_WIDTH = int(os.getenv("ALERT_SCREENSHOT_WIDTH", "480"))
+ALERT_SCREENSHOT_QUALITY = int(os.getenv("ALERT_SCREENSHOT_QUALITY", "70"))
+
+_queue = asyncio.Queue()  # interview_ids with a pending alert
+_pending = {}  # interview_id -> alert dict
+_stats = {"queued": 0, "sent": 0, "failed": 0, "deduped": 0, "retries": 0}
+
+def compress_screenshot(data: bytes):
+    """Downscale a JPEG to ALERT_SCREENSHOT_WIDTH and re-encode it; None if undecodable"""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    height, width = image.shape[:2]
+    if width > ALERT_SCREENSHOT_WIDTH:
+        size = (ALERT_SCREENSHOT_WIDTH, max(1, round(height * ALERT_SCREENSHOT_WIDTH / width)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", image, [
+        cv2.IMWRITE_JPEG_QUALITY, ALERT_SCREENSHOT_QUALITY,
+        cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+    ])
+    return encoded.tobytes() if ok else None
+
+def enqueue(company_email: str, candidate_email: str, interview_id: str, reason: str, screenshot_bytes: bytes = None):
+    """Queue an alert email without waiting for it (safe to call from the proctoring loop)"""
+    alert = {
+        "company_email": company_email,
+        "candidate_email": candidate_email,
+        "interview_id": interview_id,
+        "reason": reason,
+        "screenshot_bytes": screenshot_bytes,
+        "compressed": False,
+        "attempts": 0,
+        "queued_at": time.time(),
+    }
+    if interview_id in _pending:
+        # Already waiting to go out; send the newer details in its place
+        _stats["deduped"] += 1
+        _pending[interview_id] = alert
+        return
+    _pending[interview_id] = alert
+    _stats["queued"] += 1
+    _queue.put_nowait(interview_id)
+
+def _retry(alert: dict):
+    if alert["interview_id"] in _pending:
+        return  # A newer alert for this interview is queued; it supersedes this one
+    _pending[alert["interview_id"]] = alert
+    _queue.put_nowait(alert["interview_id"])
+
+async def deliver(alert: dict):
+    if alert["screenshot_bytes"] and not alert["compressed"]:
+        # Compressed once, even if sending is retried
+        alert["screenshot_bytes"] = await asyncio.to_thread(compress_screenshot, alert["screenshot_bytes"])
+        alert["compressed"] = True
+    await auth.send_suspicious_activity_email(
+        company_email=alert["company_email"],
+        candidate_email=alert["candidate_email"],
+        interview_id=alert["interview_id"],
+        reason=alert["reason"],
+        screenshot_bytes=alert["screenshot_bytes"],
+    )
+
+async def _send_alerts():
+    loop = asyncio.get_running_loop()
+    while True:
+        interview_id = await _queue.get()
+        alert = _pending.pop(interview_id, None)
+        if alert is None:
+            continue
+        alert["attempts"] += 1
+        try:
+            await deliver(alert)
+            _stats["sent"] += 1
+        except Exception as e:
+            if alert["attempts"] >= ALERT_MAX_ATTEMPTS:
+                _stats["failed"] += 1
+                print(f"Giving up on suspicious activity alert for {interview_id} after {alert['attempts']} attempts: {e}")
+                continue
+            delay = ALERT_RETRY_BASE_SECONDS * 2 ** (alert["attempts"] - 1)
+            _stats["retries"] += 1
+            print(f"Suspicious activity alert for {interview_id} failed, retrying in {delay:g}s: {e}")
+            loop.call_later(delay, _retry, alert)
+
+async def alert_sender():
+    """Start the background senders that drain the outbox"""
+    for _ in range(max(1, ALERT_SENDERS)):
+        asyncio.create_task(_send_alerts())
+
+def stats() -> dict:
+    return {"pending": len(_pending), **_stats}
+
+metrics.register_source("alert_outbox", stats)
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from backend.compony_api import models, schemas
 from backend.auth import get_password_hash
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 
 def get_company_by_email(db: Session, email: str):
     return db.query(models.Company).filter(models.Company.email == email).first()
@@ -76,6 +77,30 @@ def create_interview(db: Session, interview: schemas.InterviewCreate, company_id
 def get_interview_by_interview_id(db: Session, interview_id: str):
     return db.query(models.Interview).filter(models.Interview.interview_id == interview_id).first()
 
+def interview_window_error(interview: models.Interview) -> Optional[str]:
+    """Why the interview can't be taken right now (before its start or after its duration), or None"""
+    if not interview.scheduled_start_time:
+        return None
+    # Use timezone-aware UTC
+    now = datetime.now(timezone.utc)
+    start_time = interview.scheduled_start_time
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+
+    if now < start_time:
+        seconds = int((start_time - now).total_seconds())
+        if seconds < 60:
+            time_str = "less than a minute"
+        else:
+            time_str = f"{seconds // 3600}h {(seconds // 60) % 60}m"
+        return f"Interview not yet started. Starts in {time_str}"
+
+    if interview.duration_minutes:
+        end_time = start_time + timedelta(minutes=interview.duration_minutes)
+        if now > end_time:
+            return "Interview has expired"
+    return None
+
 def create_answer(db: Session, interview_id: str, answers: List[str]):
     db_answer = models.Answer(
         interview_id=interview_id,
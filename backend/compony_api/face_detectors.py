@@ -0,0 +1,110 @@
+import os
+from abc import ABC, abstractmethod
+
+import cv2
+
+# Face detector backends for proctoring. Each takes a frame (grayscale, or BGR
+# for detectors with needs_color) and returns (x, y, w, h) boxes. Pick one per
+# deployment with FACE_DETECTOR; compare them with
+# backend/benchmark_face_detection.py.
+
+FACE_DETECTOR = os.getenv("FACE_DETECTOR", "haar")  # 'haar' or 'yunet'
+YUNET_MODEL_PATH = os.getenv("YUNET_MODEL_PATH", "face_detection_yunet_2023mar.onnx")
+YUNET_SCORE_THRESHOLD = float(os.getenv("YUNET_SCORE_THRESHOLD", "0.8"))
+
+# Initialize Face Detection
+def load_cascades():
+    paths = [
+        # Standard location
+        os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'),
+        # Fallback for some linux distros
+        "/usr/share/opencv4/haarcascades/haarcascade_frontalface_default.xml",
+        "/usr/share/opencv/haarcascades/haarcascade_frontalface_default.xml",
+    ]
+
+    face_cas = None
+    for p in paths:
+        if os.path.exists(p):
+            face_cas = cv2.CascadeClassifier(p)
+            if not face_cas.empty():
+                print(f"Loaded face cascade from: {p}")
+                break
+
+    if face_cas is None or face_cas.empty():
+        print("WARNING: Could not load face cascade classifier!")
+        # Create a dummy one to avoid crashes, but detection will fail
+        face_cas = cv2.CascadeClassifier()
+
+    return face_cas
+
+class FaceDetector(ABC):
+    name = "base"
+    needs_color = False
+
+    @abstractmethod
+    def detect(self, image, min_size: int = None, max_size: int = None) -> list:
+        """Return (x, y, w, h) face boxes, optionally bounded in size"""
+
+class HaarFaceDetector(FaceDetector):
+    """OpenCV Haar cascade (the original proctoring detector)"""
+    name = "haar"
+
+    def __init__(self):
+        self.cascade = load_cascades()
+
+    def detect(self, image, min_size: int = None, max_size: int = None) -> list:
+        kwargs = {}
+        if min_size:
+            kwargs["minSize"] = (min_size, min_size)
+        if max_size:
+            kwargs["maxSize"] = (max_size, max_size)
+        return [tuple(face) for face in self.cascade.detectMultiScale(image, 1.1, 4, **kwargs)]
+
+class YuNetFaceDetector(FaceDetector):
+    """OpenCV DNN YuNet detector on CPU (needs the ONNX model at YUNET_MODEL_PATH)"""
+    name = "yunet"
+    needs_color = True
+
+    def __init__(self):
+        if not os.path.exists(YUNET_MODEL_PATH):
+            raise FileNotFoundError(f"YuNet model not found at {YUNET_MODEL_PATH}")
+        self.detector = cv2.FaceDetectorYN.create(YUNET_MODEL_PATH, "", (320, 320), YUNET_SCORE_THRESHOLD)
+        self.input_size = (320, 320)
+        print(f"Loaded YuNet face detector from: {YUNET_MODEL_PATH}")
+
+    def detect(self, image, min_size: int = None, max_size: int = None) -> list:
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        input_size = (image.shape[1], image.shape[0])
+        if input_size != self.input_size:
+            self.detector.setInputSize(input_size)
+            self.input_size = input_size
+
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return []
+        boxes = []
+        for face in faces:
+            x, y, w, h = (int(v) for v in face[:4])
+            size = max(w, h)
+            if (min_size and size < min_size) or (max_size and size > max_size):
+                continue
+            boxes.append((x, y, w, h))
+        return boxes
+
+DETECTORS = {
+    HaarFaceDetector.name: HaarFaceDetector,
+    YuNetFaceDetector.name: YuNetFaceDetector,
+}
+
+def create_detector(name: str = FACE_DETECTOR) -> FaceDetector:
+    """Instantiate detector `name`, falling back to Haar if it can't be loaded"""
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector: {name}")
+    try:
+        return DETECTORS[name]()
+    except Exception as e:
+        if name == HaarFaceDetector.name:
+            raise
+        print(f"Could not load face detector '{name}', falling back to haar: {e}")
+        return HaarFaceDetector()
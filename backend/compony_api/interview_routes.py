@@ -1,57 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
-import google.generativeai as genai
+import asyncio
 import os
 import json
-import cv2
-import numpy as np
-import time
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import List
 import uuid
 
-from backend.compony_api import schemas, models, auth, crud
-from backend.database import get_db
+from backend import llm_fallback
+from backend.compony_api import schemas, models, auth, crud, tts_routes, proctoring, proctoring_events, alert_outbox
+from backend.database import get_db, SessionLocal
 
 router = APIRouter()
 
-# Initialize Gemini
-if os.getenv("GEMINI_API_KEY"):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
 # Frontend URL for interview links
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
-# Initialize Face Detection
-def load_cascades():
-    paths = [
-        # Standard location
-        os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'),
-        # Fallback for some linux distros
-        "/usr/share/opencv4/haarcascades/haarcascade_frontalface_default.xml",
-        "/usr/share/opencv/haarcascades/haarcascade_frontalface_default.xml",
-    ]
-    
-    face_cas = None
-    for p in paths:
-        if os.path.exists(p):
-            face_cas = cv2.CascadeClassifier(p)
-            if not face_cas.empty():
-                print(f"Loaded face cascade from: {p}")
-                break
-    
-    if face_cas is None or face_cas.empty():
-        print("WARNING: Could not load face cascade classifier!")
-        # Create a dummy one to avoid crashes, but detection will fail
-        face_cas = cv2.CascadeClassifier()
-
-    return face_cas
-
-face_cascade = load_cascades()
-
-SUSPICIOUS_DURATION_THRESHOLD = 10
-EMAIL_COOLDOWN = 60
-
 @router.post("/create-interview", status_code=201)
 async def create_interview(
     interview_data: schemas.InterviewCreate,
@@ -106,6 +71,10 @@ async def create_interview(
         except Exception as e:
             print(f"Failed to send email to {candidate_email}: {e}")
 
+    # Voice interviews read every question aloud; render the audio now rather than on first use
+    if interview_data.interview_type == "voice":
+        tts_routes.schedule_prerender(interview_data.questions)
+
     return {
         "message": f"Interview created and sent to {created_count} candidate(s) successfully"
     }
@@ -124,29 +93,20 @@ def get_interview(
         raise HTTPException(status_code=404, detail="Interview not found")
         
     # Check for scheduling constraints
-    if interview.scheduled_start_time:
-        # Use timezone-aware UTC
-        now = datetime.now(timezone.utc)
-        start_time = interview.scheduled_start_time
-        if start_time.tzinfo is None:
-            start_time = start_time.replace(tzinfo=timezone.utc)
-            
-        if now < start_time:
-             time_until = start_time - now
-             seconds = int(time_until.total_seconds())
-             if seconds < 60:
-                 time_str = "less than a minute"
-             else:
-                 time_str = f"{seconds // 3600}h {(seconds // 60) % 60}m"
-             raise HTTPException(status_code=403, detail=f"Interview not yet started. Starts in {time_str}")
-        
-        if interview.duration_minutes:
-            end_time = start_time + timedelta(minutes=interview.duration_minutes)
-            if now > end_time:
-                raise HTTPException(status_code=403, detail="Interview has expired")
+    window_error = crud.interview_window_error(interview)
+    if window_error:
+        raise HTTPException(status_code=403, detail=window_error)
 
     return interview
 
+def parse_evaluation(text_response: str):
+    text_response = text_response.strip()
+    if text_response.startswith("```json"):
+        text_response = text_response[7:]
+    if text_response.endswith("```"):
+        text_response = text_response[:-3]
+    return json.loads(text_response.strip())
+
 @router.post("/interview/{interview_id}/submit")
 async def submit_interview(
     interview_id: str,
@@ -160,16 +120,6 @@ async def submit_interview(
 
     # 2. Evaluate Answers First (Optimized with Gemini Flash)
     print("START_EVALUATION")
-    evaluation_result = []
-    
-    # List of models to try in order of preference
-    models_to_try = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash']
-
-    
-    import time
-    
-    evaluation_success = False
-    
     questions = interview.questions
     answers = answers_data.answers
     
@@ -181,36 +131,11 @@ async def submit_interview(
     
 {qa_pairs_str}"""
 
-    for model_name in models_to_try:
-        if evaluation_success:
-            break
-            
-        try:
-            print(f"Attempting evaluation with model: {model_name}")
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            text_response = response.text.strip()
-            
-            # Cleanup
-            if text_response.startswith("```json"):
-                text_response = text_response[7:]
-            if text_response.endswith("```"):
-                text_response = text_response[:-3]
-                
-            evaluation_result = json.loads(text_response.strip())
-            evaluation_success = True
-            print("END_EVALUATION")
-            
-        except Exception as e:
-            print(f"Evaluation failed with {model_name}: {e}")
-            # If it's a quota error (429), wait a bit before trying the next model
-            if "429" in str(e) or "Resource" in str(e):
-                print("Quota exceeded, waiting 5 seconds...")
-                time.sleep(5)
-            continue
-
-    if not evaluation_success:
-        print("All valuation attempts failed.")
+    try:
+        evaluation_result, model_name = await llm_fallback.generate_with_fallback(prompt, parse=parse_evaluation)
+        print(f"END_EVALUATION (model: {model_name})")
+    except llm_fallback.LLMUnavailableError as e:
+        print(f"All evaluation attempts failed: {e}")
         # Return empty evaluation structure
         evaluation_result = [{"score": 0, "feedback": "Evaluation unavailable (Quota Limit)"} for _ in answers]
 
@@ -234,77 +159,50 @@ async def submit_interview(
 
     return {"message": "Interview submitted and evaluated successfully", "evaluation": evaluation_result}
 
+@dataclass(frozen=True)
+class ProctoringContext:
+    """Interview details the proctoring socket needs, loaded once so no DB session is held"""
+    interview_id: str
+    candidate_email: str
+    company_email: str
+
+def load_proctoring_context(interview_id: str):
+    """Look up the interview and its company with a short-lived session"""
+    db = SessionLocal()
+    try:
+        interview = db.query(models.Interview).filter(models.Interview.interview_id == interview_id).first()
+        if not interview:
+            return None
+        company = db.query(models.Company).filter(models.Company.id == interview.company_id).first()
+        if not company:
+            return None
+        return ProctoringContext(interview_id, interview.candidate_email, company.email)
+    finally:
+        db.close()
+
 @router.websocket("/interview/{interview_id}/stream")
-async def websocket_endpoint(websocket: WebSocket, interview_id: str, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, interview_id: str):
     await websocket.accept()
-    
-    # Verify interview exists
-    interview = db.query(models.Interview).filter(models.Interview.interview_id == interview_id).first()
-    if not interview:
-        await websocket.close()
-        return
-        
-    # Get company for email
-    company = db.query(models.Company).filter(models.Company.id == interview.company_id).first()
-    if not company:
+
+    # Verify interview exists and get company for email; the connection goes straight back to the pool
+    context = await asyncio.to_thread(load_proctoring_context, interview_id)
+    if context is None:
         await websocket.close()
         return
 
-    last_face_detection_time = time.time()
-    last_email_sent_time = 0
-    last_frame = None
+    def send_alert(screenshot_bytes):
+        # Queued for the background sender; frame analysis never waits on email delivery
+        alert_outbox.enqueue(
+            company_email=context.company_email,
+            candidate_email=context.candidate_email,
+            interview_id=interview_id,
+            reason="No face detected for 10 seconds",
+            screenshot_bytes=screenshot_bytes
+        )
 
-    frame_count = 0
     try:
-        while True:
-            # 1. Receive data first (if this fails, it triggers the outer except)
-            data = await websocket.receive_bytes()
-            
-            # 2. Process data in an inner try-except to handle corrupted frames
-            try:
-                frame_count += 1
-                nparr = np.frombuffer(data, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                if frame is not None:
-                    last_frame = frame
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-
-                    current_time = time.time()
-                    face_detected = len(faces) > 0
-
-                    if not face_detected:
-                        # No face detected logic...
-                        if current_time - last_face_detection_time > SUSPICIOUS_DURATION_THRESHOLD:
-                            if current_time - last_email_sent_time > EMAIL_COOLDOWN:
-                                screenshot_bytes = None
-                                if last_frame is not None:
-                                    _, buffer = cv2.imencode('.jpg', last_frame)
-                                    screenshot_bytes = buffer.tobytes()
-                                
-                                print(f"No face detected for {interview_id}. Sending alert.")
-                                await auth.send_suspicious_activity_email(
-                                    company_email=company.email,
-                                    candidate_email=interview.candidate_email,
-                                    interview_id=interview_id,
-                                    reason="No face detected for 10 seconds",
-                                    screenshot_bytes=screenshot_bytes
-                                )
-                                last_email_sent_time = current_time
-                    else:
-                        last_face_detection_time = current_time
-                    
-                    if frame_count % 10 == 0:
-                        await websocket.send_json({
-                            "status": "active",
-                            "face_detected": face_detected,
-                            "timestamp": current_time
-                        })
-            except Exception as processing_error:
-                # Catch specifically processing errors (OpenCV, etc.)
-                print(f"Frame processing error for {interview_id}: {processing_error}")
-                continue
+        # Frames are analysed on the proctoring pool; the last JPEG received is the screenshot
+        await proctoring.ProctoringSession(websocket, interview_id, send_alert).run()
     except WebSocketDisconnect:
         print(f"Client disconnected {interview_id}")
     except Exception as e:
@@ -344,3 +242,28 @@ def get_interview_results(
         evaluation=answer_record.evaluation,
         submitted_at=answer_record.submitted_at
     )
+
+@router.get("/interview-results/{interview_id}/proctoring", response_model=schemas.ProctoringTimeline)
+def get_proctoring_timeline(
+    interview_id: str,
+    db: Session = Depends(get_db),
+    current_company: schemas.Company = Depends(auth.get_current_company)
+):
+    """Proctoring events for an interview, with face-absence aggregates"""
+    interview = db.query(models.Interview).filter(
+        models.Interview.interview_id == interview_id,
+        models.Interview.company_id == current_company.id
+    ).first()
+
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    events = db.query(models.ProctoringEvent).filter(
+        models.ProctoringEvent.interview_id == interview_id
+    ).order_by(models.ProctoringEvent.created_at, models.ProctoringEvent.id).all()
+
+    return schemas.ProctoringTimeline(
+        interview_id=interview_id,
+        summary=proctoring_events.summarize(events),
+        events=events
+    )
@@ -41,3 +41,13 @@ class Answer(Base):
     interview = relationship("Interview", back_populates="answers")
 
 Interview.answers = relationship("Answer", uselist=False, back_populates="interview")
+
+class ProctoringEvent(Base):
+    __tablename__ = "proctoring_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    interview_id = Column(String, ForeignKey("interviews.interview_id"), index=True)
+    event_type = Column(String)  # 'session_start', 'face_found', 'face_lost', 'heartbeat', 'alert', 'session_end'
+    face_detected = Column(Boolean, nullable=True)
+    details = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,489 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+from backend import metrics
+from backend.workers import WorkerPool, PoolBusyError
+from backend.compony_api import face_detectors, proctoring_events, proctoring_state
+
+# Proctoring frame analysis. Face detection runs on a bounded pool (processes
+# by default) with the face detector loaded once per worker. Each session keeps
+# only the newest unanalysed frame, so a slow detector drops stale frames
+# instead of building a backlog.
+
+PROCTORING_POOL_SIZE = int(os.getenv("PROCTORING_POOL_SIZE", str(os.cpu_count() or 2)))
+PROCTORING_POOL_KIND = os.getenv("PROCTORING_POOL_KIND", "process")  # 'process' or 'thread'
+PROCTORING_MAX_QUEUE = int(os.getenv("PROCTORING_MAX_QUEUE", "100"))
+
+SUSPICIOUS_DURATION_THRESHOLD = 10
+EMAIL_COOLDOWN = 60
+
+# Analysis rate control. Sessions are analysed at most PROCTORING_MAX_FPS,
+# rising to PROCTORING_BOOST_FPS for PROCTORING_BOOST_SECONDS after the face
+# is lost. Clients are asked for PROCTORING_CLIENT_FPS (the original capture
+# rate) and only go up to PROCTORING_BOOST_FPS while boosted. While the downscaled frame barely differs from the one last run
+# through the detector, the previous result is reused, but a full detection
+# is still forced every PROCTORING_FORCE_DETECT_SECONDS so a slow change can't
+# hide an absence past SUSPICIOUS_DURATION_THRESHOLD.
+PROCTORING_MAX_FPS = float(os.getenv("PROCTORING_MAX_FPS", "2"))
+PROCTORING_BOOST_FPS = float(os.getenv("PROCTORING_BOOST_FPS", "5"))
+PROCTORING_CLIENT_FPS = float(os.getenv("PROCTORING_CLIENT_FPS", "1"))
+PROCTORING_BOOST_SECONDS = float(os.getenv("PROCTORING_BOOST_SECONDS", "15"))
+PROCTORING_FORCE_DETECT_SECONDS = float(os.getenv("PROCTORING_FORCE_DETECT_SECONDS", "3"))
+PROCTORING_MOTION_THRESHOLD = float(os.getenv("PROCTORING_MOTION_THRESHOLD", "6"))  # Mean abs diff, 0-255
+MOTION_THUMBNAIL_SIZE = (64, 48)
+PROCTORING_STATE_SAVE_SECONDS = float(os.getenv("PROCTORING_STATE_SAVE_SECONDS", "2"))
+
+# Detection mode. 'fast' downscales to PROCTORING_WORK_WIDTH and, once a face is
+# found, searches only a padded region around it with size bounds taken from
+# the previous box, re-scanning the whole frame every
+# PROCTORING_FULL_SCAN_SECONDS. 'full' is the original full-resolution scan.
+PROCTORING_DETECTION_MODE = os.getenv("PROCTORING_DETECTION_MODE", "fast")
+PROCTORING_WORK_WIDTH = int(os.getenv("PROCTORING_WORK_WIDTH", "320"))
+PROCTORING_FULL_SCAN_SECONDS = float(os.getenv("PROCTORING_FULL_SCAN_SECONDS", "5"))
+ROI_PADDING = 0.75  # ROI extends this many face sizes past the last box on each side
+ROI_MIN_SCALE, ROI_MAX_SCALE = 0.6, 1.6  # Face size bounds relative to the last box
+MIN_FACE_FRACTION = 0.08  # Smallest face on a full scan, as a fraction of the working width
+
+# Frame format negotiated on connect. The server sends a "config" message with
+# the format, width and fps it wants: 'jpeg' frames at the working width, or
+# 'gray8' raw 8-bit grayscale rows (width x any height) after a GRAY8_MAGIC
+# header, which skip JPEG decoding entirely. The fps is re-sent when the
+# requested rate changes. Frames without the header are decoded as JPEG, so
+# older clients that ignore the config keep working. At 1 fps a 160px gray8
+# frame (19.2KB) is already about a quarter of the original 640px q0.8 JPEG,
+# and deflating it saves little more, so it is sent uncompressed.
+PROCTORING_FRAME_FORMAT = os.getenv("PROCTORING_FRAME_FORMAT", "jpeg")  # 'jpeg' or 'gray8'
+PROCTORING_JPEG_QUALITY = float(os.getenv("PROCTORING_JPEG_QUALITY", "0.7"))  # 0-1, as canvas.toBlob takes it
+PROCTORING_GRAY8_WIDTH = int(os.getenv("PROCTORING_GRAY8_WIDTH", "160"))
+GRAY8_MAGIC = b"G8"  # JPEG always starts with 0xFF, so this can't collide
+
+# One detector per worker thread/process; OpenCV detectors are not thread-safe
+_worker = threading.local()
+
+def get_detector() -> face_detectors.FaceDetector:
+    detector = getattr(_worker, "detector", None)
+    if detector is None:
+        detector = _worker.detector = face_detectors.create_detector()
+    return detector
+
+def init_worker():
+    get_detector()
+
+def to_working_resolution(image):
+    height, width = image.shape[:2]
+    if width <= PROCTORING_WORK_WIDTH:
+        return image
+    scale = PROCTORING_WORK_WIDTH / width
+    return cv2.resize(image, (PROCTORING_WORK_WIDTH, max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+
+# JPEG decoders can scale down by 2/4/8 during decoding, far cheaper than a full decode
+REDUCED_DECODE_FLAGS = (
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_GRAYSCALE, cv2.IMREAD_COLOR),
+)
+
+def decode_working_frame(buffer: np.ndarray, full_width: int, color: bool = False):
+    """Decode at the smallest scale still PROCTORING_WORK_WIDTH wide, then resize to it"""
+    for factor, gray_flag, color_flag in REDUCED_DECODE_FLAGS:
+        if factor == 1 or full_width // factor >= PROCTORING_WORK_WIDTH:
+            image = cv2.imdecode(buffer, color_flag if color else gray_flag)
+            return None if image is None else to_working_resolution(image)
+
+def detect_faces_full(image, detector=None):
+    """Original path: full-resolution scan with no size bounds"""
+    return (detector or get_detector()).detect(image)
+
+def detect_faces_fast(work, previous_box=None, detector=None):
+    """Detect on a working-resolution frame, trying the region around previous_box first.
+
+    Returns (faces, full_scan) where full_scan says whether the whole frame was searched.
+    """
+    detector = detector or get_detector()
+    frame_height, frame_width = work.shape[:2]
+    if previous_box is not None:
+        x, y, w, h = previous_box
+        size = max(w, h)
+        pad = int(size * ROI_PADDING)
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        x1, y1 = min(frame_width, x + w + pad), min(frame_height, y + h + pad)
+        if x1 - x0 >= size and y1 - y0 >= size:
+            min_side = int(size * ROI_MIN_SCALE)
+            max_side = int(size * ROI_MAX_SCALE)
+            faces = detector.detect(work[y0:y1, x0:x1], min_side, max_side)
+            if len(faces):
+                return [(fx + x0, fy + y0, fw, fh) for fx, fy, fw, fh in faces], False
+        # Lost it locally; fall through to a full scan before reporting no face
+
+    min_side = max(24, int(frame_width * MIN_FACE_FRACTION))
+    return detector.detect(work, min_side), True
+
+def largest_face(faces):
+    if len(faces) == 0:
+        return None
+    return tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+
+def is_gray8(data: bytes) -> bool:
+    return data[:len(GRAY8_MAGIC)] == GRAY8_MAGIC
+
+def raw_frame(data: bytes, width: int):
+    """View a gray8 frame's pixels as a (height, width) array; None if the size doesn't fit `width`"""
+    pixels = len(data) - len(GRAY8_MAGIC)
+    if not width or pixels <= 0 or pixels % width:
+        return None
+    height = pixels // width
+    if height < 16 or height > width * 2:
+        return None
+    return np.frombuffer(data, np.uint8, offset=len(GRAY8_MAGIC)).reshape(height, width)
+
+def frame_to_jpeg(data: bytes, raw_width: int = None):
+    """JPEG bytes for a received frame (gray8 frames are encoded), or None"""
+    if data is None or not is_gray8(data):
+        return data
+    image = raw_frame(data, raw_width)
+    return None if image is None else cv2.imencode(".jpg", image)[1].tobytes()
+
+def analyze_frame(data: bytes, reference=None, previous_box=None, raw_width=None):
+    """Decode a frame and detect faces (runs on the proctoring pool).
+
+    Frames are JPEG, or gray8 (tagged with GRAY8_MAGIC) rows `raw_width`
+    wide when that format was negotiated. When `reference` (the thumbnail of the last detected frame) is
+    given and the scene hasn't changed meaningfully, detection is skipped and
+    "detected" is False so the caller reuses its previous result.
+    `previous_box` (working-resolution coordinates) enables ROI tracking in
+    'fast' mode. Returns None for undecodable frames.
+    """
+    raw = None
+    if is_gray8(data):
+        raw = small = raw_frame(data, raw_width)
+    else:
+        buffer = np.frombuffer(data, np.uint8)
+        small = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        return None
+    thumbnail = cv2.resize(small, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+    motion = None
+    if reference is not None and reference.shape == thumbnail.shape:
+        motion = float(cv2.absdiff(thumbnail, reference).mean())
+        if motion < PROCTORING_MOTION_THRESHOLD:
+            return {"detected": False, "motion": motion}
+
+    # Decoding straight to grayscale skips the colour conversion entirely
+    detector = get_detector()
+    if PROCTORING_DETECTION_MODE == "full":
+        previous_box = None
+        if raw is not None:
+            image = raw
+        else:
+            image = cv2.imdecode(buffer, cv2.IMREAD_COLOR if detector.needs_color else cv2.IMREAD_GRAYSCALE)
+    elif raw is not None:
+        image = to_working_resolution(raw)
+    else:
+        image = decode_working_frame(buffer, small.shape[1] * 8, detector.needs_color)
+    if image is None:
+        return None
+    if PROCTORING_DETECTION_MODE == "full":
+        faces, full_scan = detect_faces_full(image, detector), True
+    else:
+        faces, full_scan = detect_faces_fast(image, previous_box, detector)
+    return {
+        "detected": True,
+        "face_detected": len(faces) > 0,
+        "faces": len(faces),
+        "box": largest_face(faces),
+        "full_scan": full_scan,
+        "motion": motion,
+        "thumbnail": thumbnail,
+    }
+
+proctoring_pool = WorkerPool(
+    "proctoring", PROCTORING_POOL_SIZE, kind=PROCTORING_POOL_KIND,
+    max_queue=PROCTORING_MAX_QUEUE, initializer=init_worker,
+)
+
+async def warm_proctoring_pool():
+    """Start a detector worker at startup so the first candidate doesn't wait for it"""
+    try:
+        await proctoring_pool.run(init_worker)
+    except Exception as e:
+        print(f"Proctoring warm-up failed: {e}")
+
+_sessions = {}  # interview_id -> ProctoringSession
+_connection_ids = itertools.count(1)  # Opaque ids for /metrics; interview ids are candidate credentials
+
+class ProctoringSession:
+    """Frame analysis and suspicious-activity tracking for one proctoring WebSocket"""
+
+    def __init__(self, websocket, interview_id: str, on_suspicious, state_store=None):
+        self.websocket = websocket
+        self.interview_id = interview_id
+        self.on_suspicious = on_suspicious  # callable(screenshot_bytes); must not block, e.g. alert_outbox.enqueue
+        self.state_store = state_store or proctoring_state.get_state_store()
+        self.state_saved_at = 0.0
+        self.connection_id = next(_connection_ids)
+        self.token = uuid.uuid4().hex  # Owner of the saved state while this connection is the latest
+        self.superseded = False  # A newer connection for the interview has taken over the state
+        self.frame_format = PROCTORING_FRAME_FORMAT
+        self.raw_width = PROCTORING_GRAY8_WIDTH if self.frame_format == "gray8" else None
+        self.requested_fps = None  # Last fps sent to the client
+        self.latest = None  # (frame bytes, received_at)
+        self.frame_ready = asyncio.Event()
+        self.last_face_detection_time = time.time()
+        self.last_email_sent_time = 0
+        self.last_frame = None  # Last decodable frame, as received
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+        self.frames_detected = 0
+        self.frames_reused = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.face_detected = None  # Result of the last detector run
+        self.face_lost_at = None
+        self.reference_thumbnail = None
+        self.last_detection_at = 0.0
+        self.face_box = None  # Last face position, for ROI tracking
+        self.last_full_scan_at = 0.0
+        self.last_heartbeat_at = time.time()
+
+    def submit(self, data: bytes):
+        """Offer a frame for analysis, replacing any frame still waiting"""
+        self.frames_received += 1
+        self.bytes_received += len(data)
+        if self.latest is not None:
+            self.frames_dropped += 1
+        self.latest = (data, time.monotonic())
+        self.frame_ready.set()
+
+    def frame_config(self, fps: float) -> dict:
+        """The frame format, size and rate this session wants from the client"""
+        config = {"type": "config", "format": self.frame_format, "fps": fps}
+        if self.frame_format == "gray8":
+            config["width"] = self.raw_width
+        else:
+            config["width"] = PROCTORING_WORK_WIDTH
+            config["quality"] = PROCTORING_JPEG_QUALITY
+        return config
+
+    async def send_config(self, fps: float):
+        """Tell the client to capture at `fps` (and the negotiated format), if that changed"""
+        if fps == self.requested_fps:
+            return
+        self.requested_fps = fps
+        try:
+            await self.websocket.send_json(self.frame_config(fps))
+        except Exception as e:
+            print(f"Could not send proctoring config to {self.interview_id}: {e}")
+
+    def boosted(self, now: float) -> bool:
+        return self.face_lost_at is not None and now - self.face_lost_at < PROCTORING_BOOST_SECONDS
+
+    def needs_detection(self, now: float) -> bool:
+        return (
+            self.face_detected is None
+            or self.reference_thumbnail is None
+            or self.boosted(now)
+            or now - self.last_detection_at >= PROCTORING_FORCE_DETECT_SECONDS
+        )
+
+    def record_detection(self, now: float, result: dict):
+        if self.face_detected is not False and not result["face_detected"]:
+            # Lost, or absent from the very first detection; both boost the rate
+            self.face_lost_at = now
+        elif result["face_detected"]:
+            self.face_lost_at = None
+        if result["face_detected"] != self.face_detected:
+            proctoring_events.record(
+                self.interview_id, "face_found" if result["face_detected"] else "face_lost",
+                face_detected=result["face_detected"], details={"faces": result["faces"]},
+            )
+        self.face_detected = result["face_detected"]
+        self.reference_thumbnail = result["thumbnail"]
+        self.last_detection_at = now
+        self.face_box = result["box"]
+        if result["full_scan"]:
+            self.last_full_scan_at = now
+
+    def tracking_box(self, now: float):
+        """The box to search around, or None when a full-frame scan is due"""
+        if now - self.last_full_scan_at >= PROCTORING_FULL_SCAN_SECONDS:
+            return None
+        return self.face_box
+
+    async def analyze_frames(self):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            data, received_at = self.latest
+            self.latest = None
+            started = time.monotonic()
+
+            try:
+                reference = None if self.needs_detection(started) else self.reference_thumbnail
+                result = await proctoring_pool.run(
+                    analyze_frame, data, reference, self.tracking_box(started), self.raw_width,
+                )
+            except PoolBusyError:
+                self.frames_dropped += 1
+                continue
+            except Exception as processing_error:
+                # Catch specifically processing errors (OpenCV, etc.)
+                print(f"Frame processing error for {self.interview_id}: {processing_error}")
+                continue
+
+            self.lag_ms = round((time.monotonic() - received_at) * 1000, 1)
+            self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+            if result is not None:
+                self.frames_analyzed += 1
+                self.last_frame = data
+                if result["detected"]:
+                    self.frames_detected += 1
+                    self.record_detection(started, result)
+                else:
+                    self.frames_reused += 1
+                try:
+                    await self.handle_result(self.face_detected)
+                except Exception as e:
+                    print(f"Proctoring update error for {self.interview_id}: {e}")
+
+            # Frames arriving during the pause replace each other; only the newest is analysed
+            boosted = self.boosted(time.monotonic())
+            await self.send_config(PROCTORING_BOOST_FPS if boosted else PROCTORING_CLIENT_FPS)
+            fps = PROCTORING_BOOST_FPS if boosted else PROCTORING_MAX_FPS
+            if fps > 0:
+                await asyncio.sleep(max(0.0, started + 1.0 / fps - time.monotonic()))
+
+    def state(self) -> dict:
+        return {
+            "last_face_detection_time": self.last_face_detection_time,
+            "last_email_sent_time": self.last_email_sent_time,
+            "face_detected": self.face_detected,
+            "owner": self.token,
+        }
+
+    async def resume_state(self) -> bool:
+        """Pick up the timers from an earlier connection for this interview, if any.
+
+        Time spent disconnected counts as time without a face, so reconnecting
+        can't reset the suspicion timer or the alert cooldown.
+        """
+        try:
+            state = await self.state_store.load(self.interview_id)
+        except Exception as e:
+            print(f"Could not load proctoring state for {self.interview_id}: {e}")
+            return False
+        if not state:
+            return False
+        self.last_face_detection_time = state["last_face_detection_time"]
+        self.last_email_sent_time = state["last_email_sent_time"]
+        return True
+
+    async def save_state(self, force: bool = False, claim: bool = False):
+        """Save the timers, unless a newer connection for this interview owns the state.
+
+        `claim` saves unconditionally, making this connection the owner; a
+        session claims on connect, so an older connection still closing down
+        can't overwrite what the new one resumed.
+        """
+        now = time.time()
+        if self.superseded or (not force and now - self.state_saved_at < PROCTORING_STATE_SAVE_SECONDS):
+            return
+        self.state_saved_at = now
+        try:
+            if not claim:
+                current = await self.state_store.load(self.interview_id)
+                if current and current.get("owner") not in (None, self.token):
+                    self.superseded = True
+                    return
+            await self.state_store.save(self.interview_id, self.state())
+        except Exception as e:
+            print(f"Could not save proctoring state for {self.interview_id}: {e}")
+
+    async def handle_result(self, face_detected: bool):
+        current_time = time.time()
+        email_was_sent = self.last_email_sent_time
+
+        if not face_detected:
+            # No face detected logic...
+            if current_time - self.last_face_detection_time > SUSPICIOUS_DURATION_THRESHOLD:
+                if current_time - self.last_email_sent_time > EMAIL_COOLDOWN:
+                    print(f"No face detected for {self.interview_id}. Sending alert.")
+                    self.last_email_sent_time = current_time
+                    proctoring_events.record(
+                        self.interview_id, "alert", face_detected=False,
+                        details={"reason": "no_face", "seconds_without_face": round(current_time - self.last_face_detection_time, 1)},
+                        at=current_time,
+                    )
+                    try:
+                        self.on_suspicious(frame_to_jpeg(self.last_frame, self.raw_width))
+                    except Exception as e:
+                        print(f"Failed to queue suspicious activity alert for {self.interview_id}: {e}")
+        else:
+            self.last_face_detection_time = current_time
+
+        # Alerts are saved straight away; the rolling face timestamp at most every few seconds
+        await self.save_state(force=self.last_email_sent_time != email_was_sent)
+
+        if current_time - self.last_heartbeat_at >= proctoring_events.PROCTORING_HEARTBEAT_SECONDS:
+            self.last_heartbeat_at = current_time
+            proctoring_events.record(
+                self.interview_id, "heartbeat", face_detected=face_detected,
+                details={key: self.stats()[key] for key in ("frames_received", "frames_analyzed", "lag_ms")},
+                at=current_time,
+            )
+
+        if self.frames_analyzed % 10 == 0:
+            await self.websocket.send_json({
+                "status": "active",
+                "face_detected": face_detected,
+                "timestamp": current_time
+            })
+
+    async def run(self):
+        """Receive frames until the client disconnects"""
+        _sessions[self.interview_id] = self
+        resumed = await self.resume_state()
+        await self.save_state(force=True, claim=True)
+        proctoring_events.record(self.interview_id, "session_start", details={"resumed": resumed})
+        await self.send_config(PROCTORING_CLIENT_FPS)
+        analyzer = asyncio.create_task(self.analyze_frames())
+        try:
+            while True:
+                self.submit(await self.websocket.receive_bytes())
+        finally:
+            analyzer.cancel()
+            proctoring_events.record(self.interview_id, "session_end", details=self.stats())
+            await self.save_state(force=True)
+            if _sessions.get(self.interview_id) is self:
+                del _sessions[self.interview_id]
+
+    def stats(self) -> dict:
+        return {
+            "frame_format": self.frame_format,
+            "frames_received": self.frames_received,
+            "bytes_received": self.bytes_received,
+            "frames_analyzed": self.frames_analyzed,
+            "frames_dropped": self.frames_dropped,
+            "frames_detected": self.frames_detected,
+            "frames_reused": self.frames_reused,
+            "boosted": self.boosted(time.monotonic()),
+            "lag_ms": self.lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+def stats() -> dict:
+    return {
+        "active_sessions": len(_sessions),
+        "sessions": {f"connection-{session.connection_id}": session.stats() for session in _sessions.values()},
+    }
+
+metrics.register_source("proctoring", stats)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from datetime import datetime
+
+from backend import metrics
+from backend.compony_api import models
+from backend.database import SessionLocal
+
+# Durable proctoring timeline. Sessions record face transitions, alerts and
+# periodic heartbeats into an in-process buffer; a background writer flushes
+# it with one bulk insert every PROCTORING_EVENT_FLUSH_SECONDS, so database
+# load stays flat however many sessions are being proctored.
+
+PROCTORING_EVENT_FLUSH_SECONDS = float(os.getenv("PROCTORING_EVENT_FLUSH_SECONDS", "5"))
+PROCTORING_HEARTBEAT_SECONDS = float(os.getenv("PROCTORING_HEARTBEAT_SECONDS", "30"))
+PROCTORING_EVENT_BUFFER_MAX = int(os.getenv("PROCTORING_EVENT_BUFFER_MAX", "50000"))
+
+_buffer = []
+_stats = {"flushed": 0, "failed_flushes": 0, "discarded": 0}
+
+def record(interview_id: str, event_type: str, face_detected: bool = None, details: dict = None, at: float = None):
+    """Queue an event; `at` is a time.time() timestamp (defaults to now)"""
+    if len(_buffer) >= PROCTORING_EVENT_BUFFER_MAX:
+        _stats["discarded"] += 1
+        return
+    _buffer.append({
+        "interview_id": interview_id,
+        "event_type": event_type,
+        "face_detected": face_detected,
+        "details": details,
+        "created_at": datetime.utcfromtimestamp(at) if at else datetime.utcnow(),
+    })
+
+def _write(rows: list) -> bool:
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(models.ProctoringEvent, rows)
+        db.commit()
+        _stats["flushed"] += len(rows)
+        return True
+    except Exception as e:
+        db.rollback()
+        _stats["failed_flushes"] += 1
+        print(f"Proctoring event flush failed ({len(rows)} events): {e}")
+        return False
+    finally:
+        db.close()
+
+def _take() -> list:
+    global _buffer
+    rows, _buffer = _buffer, []
+    return rows
+
+def _requeue(rows: list):
+    """Put unwritten events back for the next attempt, oldest first, within the buffer limit"""
+    global _buffer
+    _buffer = (rows + _buffer)[-PROCTORING_EVENT_BUFFER_MAX:]
+
+def flush():
+    """Write every buffered event in one bulk insert (blocking; used at shutdown)"""
+    rows = _take()
+    if rows and not _write(rows):
+        _requeue(rows)
+
+async def flush_async():
+    # The buffer is only swapped on the event loop; the insert runs in a thread
+    rows = _take()
+    if rows and not await asyncio.to_thread(_write, rows):
+        _requeue(rows)
+
+async def proctoring_event_writer():
+    """Flush buffered proctoring events in the background"""
+
+    async def flush_periodically():
+        while True:
+            await asyncio.sleep(PROCTORING_EVENT_FLUSH_SECONDS)
+            await flush_async()
+
+    asyncio.create_task(flush_periodically())
+
+def summarize(events: list) -> dict:
+    """Aggregate an interview's events (oldest first) into monitored and face-absent time"""
+    # A gap longer than this without any event means the session wasn't being monitored
+    max_gap = PROCTORING_HEARTBEAT_SECONDS * 2
+    monitored = absent = longest_absence = current_absence = 0.0
+    face_lost_count = alert_count = sessions = 0
+    state = None
+    previous = None
+
+    for event in events:
+        if previous is not None and state is not None:
+            elapsed = min((event.created_at - previous).total_seconds(), max_gap)
+            monitored += elapsed
+            if state is False:
+                absent += elapsed
+                current_absence += elapsed
+                longest_absence = max(longest_absence, current_absence)
+        previous = event.created_at
+
+        if event.event_type == "session_start":
+            sessions += 1
+            state = None
+        elif event.event_type == "session_end":
+            state = None
+        elif event.event_type == "alert":
+            alert_count += 1
+        elif event.face_detected is not None:
+            if event.event_type == "face_lost":
+                face_lost_count += 1
+            state = event.face_detected
+        if state is not False:
+            current_absence = 0.0
+
+    return {
+        "sessions": sessions,
+        "monitored_seconds": round(monitored, 1),
+        "time_without_face_seconds": round(absent, 1),
+        "longest_absence_seconds": round(longest_absence, 1),
+        "face_lost_count": face_lost_count,
+        "alert_count": alert_count,
+    }
+
+def stats() -> dict:
+    return {"buffered": len(_buffer), **_stats}
+
+metrics.register_source("proctoring_events", stats)
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+
+from backend.shared_store import get_redis
+
+# Where proctoring sessions keep the state that must survive a reconnect: the
+# suspicion timer and the alert cooldown. With REDIS_URL set it is shared, so
+# a candidate moved to another node (or reconnecting) resumes where they left
+# off instead of resetting the timers; otherwise it lives in this process.
+# Either way a state expires PROCTORING_STATE_TTL_SECONDS after its last save.
+
+PROCTORING_STATE_TTL_SECONDS = int(os.getenv("PROCTORING_STATE_TTL_SECONDS", str(6 * 60 * 60)))
+
+class SessionStateStore(ABC):
+    @abstractmethod
+    async def load(self, interview_id: str):
+        """Return the saved state dict, or None"""
+
+    @abstractmethod
+    async def save(self, interview_id: str, state: dict):
+        """Save the state, replacing any earlier one and restarting its TTL"""
+
+class MemorySessionStateStore(SessionStateStore):
+    SWEEP_INTERVAL_SECONDS = 60
+
+    def __init__(self, ttl_seconds: int = PROCTORING_STATE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.states = {}  # interview_id -> (expires_at, state)
+        self.swept_at = time.monotonic()
+
+    def sweep(self, now: float):
+        """Drop every expired state so finished interviews don't accumulate"""
+        self.swept_at = now
+        for interview_id in [key for key, (expires_at, _) in self.states.items() if expires_at <= now]:
+            del self.states[interview_id]
+
+    async def load(self, interview_id: str):
+        entry = self.states.get(interview_id)
+        if entry is None:
+            return None
+        expires_at, state = entry
+        if expires_at <= time.monotonic():
+            del self.states[interview_id]
+            return None
+        return dict(state)
+
+    async def save(self, interview_id: str, state: dict):
+        now = time.monotonic()
+        if now - self.swept_at >= self.SWEEP_INTERVAL_SECONDS:
+            self.sweep(now)
+        self.states[interview_id] = (now + self.ttl_seconds, dict(state))
+
+class RedisSessionStateStore(SessionStateStore):
+    """Shared store on any client with redis.asyncio's get/set (a local stand-in works in tests)"""
+
+    def __init__(self, client, ttl_seconds: int = PROCTORING_STATE_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    def key(self, interview_id: str) -> str:
+        return f"proctoring:state:{interview_id}"
+
+    async def load(self, interview_id: str):
+        raw = await self.client.get(self.key(interview_id))
+        return json.loads(raw) if raw else None
+
+    async def save(self, interview_id: str, state: dict):
+        await self.client.set(self.key(interview_id), json.dumps(state), ex=self.ttl_seconds)
+
+_store = None
+
+def get_state_store() -> SessionStateStore:
+    global _store
+    if _store is None:
+        client = get_redis()
+        _store = RedisSessionStateStore(client) if client is not None else MemorySessionStateStore()
+    return _store
@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from typing import List
 from sqlalchemy.orm import Session
-import google.generativeai as genai
-import os
 import json
 import asyncio
 
+from backend import llm
 from backend.compony_api import schemas, auth
 from backend.api.cv_parser_utils import extract_text_from_pdf, extract_text_from_docx
 
 router = APIRouter()
 
-async def process_resume(resume: UploadFile, job_description: str, model: genai.GenerativeModel):
+async def process_resume(resume: UploadFile, job_description: str):
     file_content = await resume.read()
     if resume.content_type == "application/pdf":
         resume_text = extract_text_from_pdf(file_content)
@@ -51,8 +50,7 @@ async def process_resume(resume: UploadFile, job_description: str, model: genai.
 
     try:
         print("Generating content with Gemini...")
-        response = await model.generate_content_async(prompt)
-        text_response = response.text
+        text_response = await llm.generate_text(prompt)
         print(f"Gemini response: {text_response}")
         
         # Clean the response to extract only the JSON part
@@ -82,13 +80,10 @@ async def shortlist_resumes(
     job_description: str = Form(...),
     current_company: schemas.Company = Depends(auth.get_current_company),
 ):
-    if not os.getenv("GEMINI_API_KEY"):
+    if not llm.is_configured():
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-flash')
-
-    tasks = [process_resume(resume, job_description, model) for resume in resumes]
+    tasks = [process_resume(resume, job_description) for resume in resumes]
     results = await asyncio.gather(*tasks)
     
     shortlisted_resumes = [res for res in results if res is not None]
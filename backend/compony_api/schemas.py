@@ -69,3 +69,25 @@ class InterviewResult(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ProctoringEvent(BaseModel):
+    event_type: str
+    face_detected: Optional[bool] = None
+    details: Optional[Any] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ProctoringSummary(BaseModel):
+    sessions: int
+    monitored_seconds: float
+    time_without_face_seconds: float
+    longest_absence_seconds: float
+    face_lost_count: int
+    alert_count: int
+
+class ProctoringTimeline(BaseModel):
+    interview_id: str
+    summary: ProctoringSummary
+    events: List[ProctoringEvent]
@@ -1,28 +1,182 @@
-from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
 from gtts import gTTS
+import asyncio
 import io
+import os
+import re
+
+from backend import tts_cache, metrics
+from backend.compony_api import models, crud
+from backend.database import get_db
 
 router = APIRouter()
 
+# Audio is content-addressed, so a given URL/ETag never changes
+TTS_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Per-interview URLs are not content-addressed (questions can be edited) and
+# are gated by the interview window, so browsers revalidate them every time
+TTS_INTERVIEW_CACHE_CONTROL = "private, no-cache"
+TTS_PRERENDER_CONCURRENCY = int(os.getenv("TTS_PRERENDER_CONCURRENCY", "2"))
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "3"))
+TTS_MIN_SEGMENT_CHARS = 40  # Shorter sentences are merged into their neighbour
+
+_prerender_tasks = set()
+
+def synthesize_speech(text: str, lang: str = 'en', tld: str = 'com') -> bytes:
+    """Render text to MP3 bytes with gTTS (blocking network call)"""
+    tts = gTTS(text=text, lang=lang, tld=tld) # tld='com' defaults to US English accent
+
+    # Save to BytesIO buffer
+    mp3_fp = io.BytesIO()
+    tts.write_to_fp(mp3_fp)
+    return mp3_fp.getvalue()
+
+async def get_speech(text: str, lang: str = 'en', tld: str = 'com'):
+    """Return (cache_key, mp3 bytes), synthesizing only on a cache miss"""
+    return await tts_cache.get_or_synthesize(
+        text, lang, tld, lambda: asyncio.to_thread(synthesize_speech, text, lang, tld)
+    )
+
+async def synthesize_speech_async(text: str, lang: str = 'en', tld: str = 'com') -> bytes:
+    _, audio = await get_speech(text, lang, tld)
+    return audio
+
+async def prerender_speech(texts: list):
+    """Synthesize every text into the TTS cache so candidates never wait on gTTS"""
+    semaphore = asyncio.Semaphore(TTS_PRERENDER_CONCURRENCY)
+
+    async def render(text):
+        async with semaphore:
+            try:
+                await get_speech(text)
+                metrics.increment("tts.prerendered")
+            except Exception as e:
+                metrics.increment("tts.prerender_failed")
+                print(f"TTS pre-render failed for '{text[:40]}': {e}")
+
+    await asyncio.gather(*(render(text) for text in texts if text and str(text).strip()))
+
+def schedule_prerender(texts: list):
+    """Start pre-rendering in the background; the caller does not wait for it"""
+    task = asyncio.create_task(prerender_speech([str(text) for text in texts]))
+    _prerender_tasks.add(task)  # Keep a reference until it finishes
+    task.add_done_callback(_prerender_tasks.discard)
+
+def split_sentences(text: str) -> list:
+    """Split text into sentence-sized segments, merging very short ones"""
+    segments = []
+    for sentence in re.split(r"(?<=[.!?;:])\s+", text.strip()):
+        if segments and len(segments[-1]) < TTS_MIN_SEGMENT_CHARS:
+            segments[-1] = f"{segments[-1]} {sentence}"
+        elif sentence:
+            segments.append(sentence)
+    return segments
+
+async def stream_speech(text: str, lang: str = 'en', tld: str = 'com'):
+    """Start synthesizing every sentence (bounded) and return an iterator of MP3 segments in order.
+
+    The first segment is awaited before returning so a failure can still
+    become a proper error response.
+    """
+    semaphore = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
+
+    async def render(sentence):
+        async with semaphore:
+            return await synthesize_speech_async(sentence, lang, tld)
+
+    tasks = [asyncio.create_task(render(sentence)) for sentence in split_sentences(text)]
+    try:
+        first = await tasks[0]
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    async def segments():
+        try:
+            yield first
+            for task in tasks[1:]:
+                yield await task
+        except Exception as e:
+            print(f"TTS stream error: {e}")
+        finally:
+            # Client went away or a segment failed; don't keep synthesizing
+            for task in tasks:
+                task.cancel()
+
+    return segments()
+
+def audio_response(request: Request, key: str, audio: bytes, cache_control: str = TTS_CACHE_CONTROL) -> Response:
+    etag = tts_cache.etag_for(key)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=audio, media_type="audio/mpeg", headers=headers)
+
+async def _text_to_speech(request: Request, text: str, lang: str, tld: str, cache_control: str = TTS_CACHE_CONTROL):
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+
+    # Answer revalidations without touching gTTS or the cache tiers
+    key = tts_cache.cache_key(text, lang, tld)
+    if tts_cache.etag_for(key) in request.headers.get("if-none-match", ""):
+        return audio_response(request, key, b"", cache_control)
+
+    try:
+        key, audio = await get_speech(text, lang, tld)
+        return audio_response(request, key, audio, cache_control)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/tts")
-async def text_to_speech(text: str = Body(..., embed=True)):
+async def text_to_speech(request: Request, text: str = Body(..., embed=True)):
     """
     Converts text to speech using gTTS (Google Translate Text-to-Speech).
     Returns audio content as MP3.
     """
-    try:
-        # Use gTTS to generate audio
-        tts = gTTS(text=text, lang='en', tld='com') # tld='com' defaults to US English accent
-        
-        # Save to BytesIO buffer
-        mp3_fp = io.BytesIO()
-        tts.write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
-        
-        # Return the audio content
-        return Response(content=mp3_fp.read(), media_type="audio/mpeg")
+    return await _text_to_speech(request, text, 'en', 'com')
+
+@router.get("/tts")
+async def text_to_speech_get(request: Request, text: str = Query(...), lang: str = 'en', tld: str = 'com'):
+    """Cacheable GET variant of /tts; browsers reuse the MP3 via ETag/Cache-Control"""
+    return await _text_to_speech(request, text, lang, tld)
 
+async def _stream_text_to_speech(text: str, lang: str, tld: str):
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    try:
+        segments = await stream_speech(text, lang, tld)
     except Exception as e:
         print(f"TTS Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(segments, media_type="audio/mpeg")
+
+@router.post("/tts/stream")
+async def text_to_speech_stream(text: str = Body(..., embed=True)):
+    """Streams MP3 sentence by sentence so playback starts after the first one is ready"""
+    return await _stream_text_to_speech(text, 'en', 'com')
+
+@router.get("/tts/stream")
+async def text_to_speech_stream_get(text: str = Query(...), lang: str = 'en', tld: str = 'com'):
+    """GET variant of /tts/stream, usable directly as an <audio> src"""
+    return await _stream_text_to_speech(text, lang, tld)
+
+@router.get("/tts/interview/{interview_id}/{index}")
+async def interview_question_audio(request: Request, interview_id: str, index: int, db: Session = Depends(get_db)):
+    """Audio for question `index` of an interview, pre-rendered when the interview was created.
+
+    Only available while the interview is open, like the interview itself.
+    """
+    interview = db.query(models.Interview).filter(models.Interview.interview_id == interview_id).first()
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    window_error = crud.interview_window_error(interview)
+    if window_error:
+        raise HTTPException(status_code=403, detail=window_error)
+    questions = interview.questions or []
+    if index < 0 or index >= len(questions):
+        raise HTTPException(status_code=404, detail="Question not found")
+    return await _text_to_speech(request, str(questions[index]), 'en', 'com', TTS_INTERVIEW_CACHE_CONTROL)
@@ -1,10 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 
+from backend import metrics
+
 # Get the directory where this file is located
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -29,13 +31,16 @@ if "-pooler" in SQLALCHEMY_DATABASE_URL:
     # Uncomment next line to use direct connection:
     SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("-pooler", "")
 
+DB_POOL_SIZE = 5  # Number of connections to maintain
+DB_MAX_OVERFLOW = 10  # Additional connections when needed
+
 # Create engine with aggressive timeout and retry settings
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     pool_pre_ping=True,  # Verify connections before using them
     pool_recycle=300,  # Recycle connections after 5 minutes
-    pool_size=5,  # Number of connections to maintain
-    max_overflow=10,  # Additional connections when needed
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
     pool_timeout=30,  # Wait up to 30 seconds for a connection
     connect_args={
         "connect_timeout": 10,  # Connection timeout in seconds
@@ -49,6 +54,30 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Connection pool utilization, served on /metrics
+_pool_usage = {"checked_out": 0, "peak_checked_out": 0, "checkouts": 0}
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_usage["checkouts"] += 1
+    _pool_usage["checked_out"] += 1
+    _pool_usage["peak_checked_out"] = max(_pool_usage["peak_checked_out"], _pool_usage["checked_out"])
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    _pool_usage["checked_out"] = max(0, _pool_usage["checked_out"] - 1)
+
+def pool_stats() -> dict:
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    return {
+        **_pool_usage,
+        "capacity": capacity,
+        "utilization": round(_pool_usage["checked_out"] / capacity, 3),
+        "status": engine.pool.status(),
+    }
+
+metrics.register_source("db_pool", pool_stats)
+
 def get_db():
     db = SessionLocal()
     try:
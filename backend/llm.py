@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import os
+import json
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+from backend import metrics
+from backend.llm_keys import key_pool, estimate_tokens, is_quota_error
+
+# Shared Gemini client for every endpoint that talks to the LLM.
+# Each call is routed through the API key pool in llm_keys.py and sent on an
+# async client owned by this module for that key, so requests with the same
+# key share one transport. Identical prompts that are in flight at the same
+# time share a single upstream call.
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+_configured_key = None
+_async_clients = {}
+_semaphore = None
+_inflight = {}
+
+
+def is_configured() -> bool:
+    return bool(key_pool.keys)
+
+
+def configure(api_key: str = None):
+    """Configure the SDK's global key once for this process (for direct SDK use, e.g. list_models)"""
+    global _configured_key
+    api_key = api_key or (key_pool.keys[0].key if key_pool.keys else None)
+    if api_key and api_key != _configured_key:
+        genai.configure(api_key=api_key)
+        _configured_key = api_key
+
+
+def _get_async_client(api_key: str) -> glm.GenerativeServiceAsyncClient:
+    client = _async_clients.get(api_key)
+    if client is None:
+        client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+        _async_clients[api_key] = client
+    return client
+
+
+async def generate_content(prompt: str, model_name: str, api_key: str, stream: bool = False, **kwargs):
+    """Send prompt on api_key's own client; returns the SDK's response wrapper (.text, .parts, ...).
+
+    kwargs are GenerateContentRequest fields such as generation_config.
+    """
+    client = _get_async_client(api_key)
+    request = glm.GenerateContentRequest(
+        model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+        contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+        **kwargs,
+    )
+    if stream:
+        iterator = await client.stream_generate_content(request)
+        return await genai.types.AsyncGenerateContentResponse.from_aiterator(iterator)
+    response = await client.generate_content(request)
+    return genai.types.AsyncGenerateContentResponse.from_response(response)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _usage_tokens(response) -> int:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", 0) or 0
+
+
+async def _call_model(prompt: str, model_name: str, **kwargs) -> str:
+    estimated_tokens = estimate_tokens(prompt)
+    key = await key_pool.acquire(estimated_tokens)
+    try:
+        async with _get_semaphore():
+            response = await asyncio.wait_for(
+                generate_content(prompt, model_name, key.key, **kwargs),
+                timeout=LLM_TIMEOUT_SECONDS,
+            )
+    except Exception as e:
+        if is_quota_error(e):
+            key_pool.report_quota_error(key)
+        raise
+    key_pool.record_usage(key, estimated_tokens, _usage_tokens(response))
+    return response.text
+
+
+def _flight_key(prompt: str, model_name: str, kwargs: dict) -> str:
+    payload = f"{model_name}\0{prompt}\0{sorted((k, repr(v)) for k, v in kwargs.items())}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _finish_flight(flight_key: str, task: asyncio.Task):
+    _inflight.pop(flight_key, None)
+    if not task.cancelled():
+        task.exception()  # Mark as retrieved even if every caller went away
+
+
+async def generate_text(prompt: str, model_name: str = DEFAULT_MODEL, **kwargs) -> str:
+    """Run a prompt through Gemini without blocking the event loop"""
+    flight_key = _flight_key(prompt, model_name, kwargs)
+    task = _inflight.get(flight_key)
+    if task is not None:
+        metrics.increment("llm.singleflight_shared")
+    else:
+        # The upstream call runs as its own task so one caller disconnecting
+        # doesn't cancel it for everyone else waiting on the same prompt
+        task = asyncio.ensure_future(_call_model(prompt, model_name, **kwargs))
+        _inflight[flight_key] = task
+        task.add_done_callback(lambda t: _finish_flight(flight_key, t))
+    return await asyncio.shield(task)
+
+
+async def stream_text(prompt: str, model_name: str = DEFAULT_MODEL, **kwargs):
+    """Yield response text chunks as Gemini streams them.
+
+    A background task reads the stream into a queue, so the concurrency slot is
+    released as soon as Gemini finishes, however slowly the caller consumes.
+    Every chunk read is bounded by LLM_TIMEOUT_SECONDS.
+    """
+    estimated_tokens = estimate_tokens(prompt)
+    key = await key_pool.acquire(estimated_tokens)
+    chunks = asyncio.Queue()  # Text chunks, then None when done or the exception
+
+    async def read_stream():
+        try:
+            async with _get_semaphore():
+                response = await asyncio.wait_for(
+                    generate_content(prompt, model_name, key.key, stream=True, **kwargs),
+                    timeout=LLM_TIMEOUT_SECONDS,
+                )
+                iterator = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=LLM_TIMEOUT_SECONDS)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.parts:
+                        chunks.put_nowait(chunk.text)
+            key_pool.record_usage(key, estimated_tokens, _usage_tokens(response))
+            chunks.put_nowait(None)
+        except Exception as e:
+            if is_quota_error(e):
+                key_pool.report_quota_error(key)
+            chunks.put_nowait(e)
+
+    reader = asyncio.create_task(read_stream())
+    try:
+        while True:
+            item = await chunks.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        reader.cancel()  # Caller went away; stop reading upstream
+
+
+def extract_json(text_response: str):
+    """Parse a JSON payload, stripping a ```json fence if the model added one"""
+    if '```json' in text_response:
+        json_start = text_response.find('```json') + 7
+        json_end = text_response.find('```', json_start)
+        json_str = text_response[json_start:json_end].strip()
+    else:
+        json_str = text_response
+    return json.loads(json_str)
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+from google.api_core import exceptions as google_exceptions
+
+from backend import llm, metrics
+from backend.llm_keys import key_pool, is_quota_error
+
+# Model fallback for LLM calls. Models are tried in order of preference; each
+# has a circuit breaker that remembers recent quota (429) and server (5xx)
+# failures and skips the model for a cooldown window once it trips, so
+# requests during a quota incident go straight to a healthy model.
+
+LLM_FALLBACK_MODELS = [
+    m.strip()
+    for m in os.getenv("LLM_FALLBACK_MODELS", "gemini-2.5-flash,gemini-2.0-flash,gemini-1.5-flash").split(",")
+    if m.strip()
+]
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "2"))  # Attempts per model
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+LLM_BREAKER_WINDOW_SECONDS = float(os.getenv("LLM_BREAKER_WINDOW_SECONDS", "60"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "120"))
+
+
+class LLMUnavailableError(Exception):
+    """Raised when every model in the fallback chain failed or was skipped"""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, window: float, cooldown: float):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.failures = deque()
+        self.open_until = 0.0
+        self.tripped = False
+        self.probe_started = None  # Set while the half-open trial call is in flight
+
+    def allow(self) -> bool:
+        if not self.tripped:
+            return True
+        now = time.monotonic()
+        if now < self.open_until:
+            return False
+        # Half-open: let exactly one trial call through. If its outcome is never
+        # recorded (e.g. a non-transient error), another probe is allowed after
+        # a further cooldown.
+        if self.probe_started is not None and now - self.probe_started < self.cooldown:
+            return False
+        self.probe_started = now
+        return True
+
+    def record_success(self):
+        self.failures.clear()
+        self.open_until = 0.0
+        self.tripped = False
+        self.probe_started = None
+
+    def record_failure(self) -> bool:
+        """Record a failure; returns True if this trips the breaker"""
+        now = time.monotonic()
+        if self.probe_started is not None:
+            # The trial call failed; open again for another cooldown
+            self.probe_started = None
+            self.open_until = now + self.cooldown
+            return True
+        self.failures.append(now)
+        while self.failures and now - self.failures[0] > self.window:
+            self.failures.popleft()
+        if len(self.failures) >= self.threshold:
+            self.open_until = now + self.cooldown
+            self.tripped = True
+            self.failures.clear()
+            return True
+        return False
+
+    def state(self) -> dict:
+        remaining = self.open_until - time.monotonic()
+        return {
+            "open": remaining > 0,
+            "half_open": self.tripped and remaining <= 0,
+            "cooldown_remaining": round(max(remaining, 0), 1),
+            "recent_failures": len(self.failures),
+        }
+
+
+_breakers = {}
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    breaker = _breakers.get(model_name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_WINDOW_SECONDS, LLM_BREAKER_COOLDOWN_SECONDS
+        )
+        _breakers[model_name] = breaker
+    return breaker
+
+
+def is_transient_error(e: Exception) -> bool:
+    """Quota, server-side and timeout failures count against a model's breaker"""
+    return (
+        is_quota_error(e)
+        or isinstance(e, (google_exceptions.ServerError, google_exceptions.DeadlineExceeded, asyncio.TimeoutError))
+    )
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+async def generate_with_fallback(prompt: str, models: list = None, parse=None):
+    """Run prompt against the first healthy model; returns (result, model_name).
+
+    parse, if given, is applied to the response text; a parse failure moves on
+    to the next model without counting against the breaker.
+    """
+    models = models or LLM_FALLBACK_MODELS
+    last_error = None
+
+    for model_name in models:
+        breaker = get_breaker(model_name)
+        if not breaker.allow():
+            metrics.increment(f"llm.breaker_skipped.{model_name}")
+            continue
+
+        for attempt in range(LLM_RETRY_ATTEMPTS):
+            try:
+                text_response = await llm.generate_text(prompt, model_name=model_name)
+                result = parse(text_response) if parse else text_response
+                breaker.record_success()
+                metrics.increment(f"llm.served_by.{model_name}")
+                return result, model_name
+            except Exception as e:
+                last_error = e
+                print(f"LLM call failed with {model_name} (attempt {attempt + 1}): {e}")
+                if not is_transient_error(e):
+                    break
+                if breaker.record_failure():
+                    print(f"Circuit breaker opened for {model_name}")
+                    metrics.increment(f"llm.breaker_tripped.{model_name}")
+                    break
+                # The failing key is sidelined; retry on another key if one is left,
+                # otherwise the quota won't clear within a short backoff
+                if is_quota_error(e) and not key_pool.has_available_key():
+                    break
+                if attempt + 1 < LLM_RETRY_ATTEMPTS:
+                    await asyncio.sleep(backoff_delay(attempt))
+
+    metrics.increment("llm.fallback_exhausted")
+    raise LLMUnavailableError(f"All models failed or are cooling down: {last_error}")
+
+
+def stats() -> dict:
+    return {model_name: breaker.state() for model_name, breaker in _breakers.items()}
+
+
+metrics.register_source("llm_breakers", stats)
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from google.api_core import exceptions as google_exceptions
+
+from backend import metrics
+
+# Pool of Gemini API keys. Each key's requests and tokens are tracked over a
+# sliding one-minute window; every call is routed to the key with the most
+# headroom, and keys that hit a quota error are sidelined for a while.
+#
+# Keys come from GEMINI_API_KEYS (comma separated), falling back to the single
+# GEMINI_API_KEY.
+
+LLM_KEY_RPM = int(os.getenv("LLM_KEY_RPM", "15"))
+LLM_KEY_TPM = int(os.getenv("LLM_KEY_TPM", "1000000"))
+LLM_KEY_SIDELINE_SECONDS = float(os.getenv("LLM_KEY_SIDELINE_SECONDS", "60"))
+WINDOW_SECONDS = 60.0
+
+
+def load_keys() -> list:
+    keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+    if not keys and os.getenv("GEMINI_API_KEY"):
+        keys = [os.getenv("GEMINI_API_KEY")]
+    return keys
+
+
+def is_quota_error(e: Exception) -> bool:
+    return isinstance(e, google_exceptions.ResourceExhausted) or "429" in str(e)
+
+
+def estimate_tokens(prompt: str) -> int:
+    # Rough rule of thumb: ~4 characters per token
+    return max(1, len(str(prompt)) // 4)
+
+
+class ApiKeyState:
+    def __init__(self, key: str, rpm: int, tpm: int, index: int = 0):
+        self.key = key
+        self.index = index  # Position in the configured key list
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = deque()  # timestamps
+        self.tokens = deque()  # (timestamp, count)
+        self.token_total = 0
+        self.sidelined_until = 0.0
+
+    @property
+    def label(self) -> str:
+        # Shown on the unauthenticated /metrics and in logs, so no part of the key itself
+        return f"key{self.index}"
+
+    def prune(self, now: float):
+        while self.requests and now - self.requests[0] > WINDOW_SECONDS:
+            self.requests.popleft()
+        while self.tokens and now - self.tokens[0][0] > WINDOW_SECONDS:
+            self.token_total -= self.tokens.popleft()[1]
+
+    def headroom(self, now: float) -> float:
+        """Fraction of the tighter of the two limits still available (<= 0 means full)"""
+        self.prune(now)
+        return min(1 - len(self.requests) / self.rpm, 1 - self.token_total / self.tpm)
+
+    def record(self, now: float, tokens: int):
+        self.requests.append(now)
+        self.add_tokens(now, tokens)
+
+    def add_tokens(self, now: float, tokens: int):
+        self.tokens.append((now, tokens))
+        self.token_total += tokens
+
+    def next_free_at(self) -> float:
+        candidates = []
+        if self.requests:
+            candidates.append(self.requests[0] + WINDOW_SECONDS)
+        if self.tokens:
+            candidates.append(self.tokens[0][0] + WINDOW_SECONDS)
+        return min(candidates) if candidates else 0.0
+
+
+class KeyPool:
+    def __init__(self, keys: list, rpm: int = LLM_KEY_RPM, tpm: int = LLM_KEY_TPM,
+                 sideline_seconds: float = LLM_KEY_SIDELINE_SECONDS):
+        self.keys = [ApiKeyState(key, rpm, tpm, index) for index, key in enumerate(keys)]
+        self.sideline_seconds = sideline_seconds
+
+    async def acquire(self, estimated_tokens: int) -> ApiKeyState:
+        """Reserve capacity on the key with the most headroom, waiting if all are saturated"""
+        if not self.keys:
+            raise RuntimeError("No Gemini API keys configured")
+        while True:
+            now = time.monotonic()
+            active = [k for k in self.keys if k.sidelined_until <= now]
+            if not active:
+                # Every key is sidelined; use the one that comes back first rather than stall
+                active = [min(self.keys, key=lambda k: k.sidelined_until)]
+
+            best = max(active, key=lambda k: k.headroom(now))
+            if best.headroom(now) > 0:
+                best.record(now, estimated_tokens)
+                metrics.increment(f"llm.key_requests.{best.label}")
+                return best
+
+            metrics.increment("llm.key_pool_waits")
+            wait = min(k.next_free_at() for k in active) - now
+            await asyncio.sleep(min(max(wait, 0.05), 1.0))
+
+    def has_available_key(self) -> bool:
+        now = time.monotonic()
+        return any(k.sidelined_until <= now for k in self.keys)
+
+    def record_usage(self, state: ApiKeyState, estimated_tokens: int, actual_tokens: int):
+        """Correct the reserved token estimate once the real usage is known"""
+        if actual_tokens and actual_tokens != estimated_tokens:
+            state.add_tokens(time.monotonic(), actual_tokens - estimated_tokens)
+
+    def report_quota_error(self, state: ApiKeyState):
+        state.sidelined_until = time.monotonic() + self.sideline_seconds
+        metrics.increment(f"llm.key_sidelined.{state.label}")
+        print(f"Gemini key {state.label} sidelined for {self.sideline_seconds}s after quota error")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            k.label: {
+                "requests_last_minute": len(k.requests),
+                "tokens_last_minute": k.token_total,
+                "headroom": round(k.headroom(now), 3),
+                "sidelined_for": round(max(k.sidelined_until - now, 0), 1),
+            }
+            for k in self.keys
+        }
+
+
+key_pool = KeyPool(load_keys())
+
+metrics.register_source("llm_keys", key_pool.stats)
@@ -4,9 +4,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from dotenv import load_dotenv
-import os
 import asyncio
-import google.generativeai as genai
 
 # Load env vars immediately
 load_dotenv()
@@ -20,7 +18,7 @@ current_dir = Path(__file__).resolve().parent
 project_root = current_dir.parent
 sys.path.append(str(project_root))
 
-from backend import model, schemas
+from backend import model, schemas, llm, metrics, workers
 from backend.database import engine
 
 from backend.api.signup import signup
@@ -30,20 +28,24 @@ from backend.api.login import login
 from backend.api.auth_google import auth_google
 from backend.api.auth_google_callback import auth_google_callback
 from backend.api.generate_questions import generate_questions
+from backend.api.stream_questions import stream_questions
 from backend.api.evaluate_answers import evaluate_answers
 from backend.api.generate_voice_interview_questions import generate_voice_interview_questions
 from backend.api.process_voice_answer import process_voice_answer
 from backend.api.evaluate_voice_interview import evaluate_voice_interview
+from backend.api.voice_interview_session import voice_interview_session
 from backend.api.analyze_cv import analyze_cv
 from backend.api.startup_cleanup import startup_cleanup
+from backend.api.question_bank_refill import question_bank_refill
+from backend.api.transcribe_audio import warm_transcription_pool
 from backend.api import users as users_router
 from backend.api import roadmap as roadmap_router
 from backend.compony_api import main as company_api_router
 from backend.compony_api import models as company_models
+from backend.compony_api.proctoring import warm_proctoring_pool
+from backend.compony_api import proctoring_events, alert_outbox
 
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-if gemini_api_key:
-    genai.configure(api_key=gemini_api_key)
+llm.configure()
 
 app = FastAPI()
 
@@ -68,6 +70,16 @@ async def startup():
         print("An error occurred during database initialization:")
         print(e)
     await startup_cleanup()
+    await question_bank_refill()
+    asyncio.create_task(warm_transcription_pool())
+    asyncio.create_task(warm_proctoring_pool())
+    await proctoring_events.proctoring_event_writer()
+    await alert_outbox.alert_sender()
+
+@app.on_event("shutdown")
+async def shutdown():
+    proctoring_events.flush()
+    workers.shutdown_pools()
 
 # Include the new users router
 app.include_router(users_router.router, prefix="/users", tags=["users"])
@@ -95,6 +107,11 @@ async def root():
         }
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Per-worker counters and gauges (cache hit rates, pool usage, ...)"""
+    return metrics.snapshot()
+
 # <------------------- AUTH ENDPOINTS ------------------->
 
 app.post("/signup")(signup)
@@ -107,6 +124,7 @@ app.get("/auth/google/callback")(auth_google_callback)
 # <------------------- TEXT-BASED INTERVIEW ------------------->
 
 app.post("/generate-questions")(generate_questions)
+app.post("/generate-questions/stream")(stream_questions)
 app.post("/evaluate-answers")(evaluate_answers)
 
 # ==================== VOICE INTERVIEW ====================
@@ -114,6 +132,7 @@ app.post("/evaluate-answers")(evaluate_answers)
 app.post("/generate-voice-interview-questions")(generate_voice_interview_questions)
 app.post("/process-voice-answer", response_model=schemas.VoiceAnswerResponse)(process_voice_answer)
 app.post("/evaluate-voice-interview", response_model=schemas.VoiceInterviewEvaluationResponse)(evaluate_voice_interview)
+app.websocket("/voice-interview/session")(voice_interview_session)
 
 # ==================== CV ANALYSIS ====================
 
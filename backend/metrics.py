@@ -0,0 +1,35 @@
+import threading
+
+# Lightweight in-process counters and gauges, served as JSON on /metrics.
+# Each uvicorn worker keeps its own numbers.
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_sources = {}
+
+
+def increment(name: str, value: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+def register_source(name: str, fn):
+    """Register a callable whose dict result is included in every snapshot"""
+    _sources[name] = fn
+
+
+def snapshot() -> dict:
+    with _lock:
+        data = {"counters": dict(_counters), "gauges": dict(_gauges)}
+    for name, fn in _sources.items():
+        try:
+            data[name] = fn()
+        except Exception as e:
+            data[name] = {"error": str(e)}
+    return data
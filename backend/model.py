@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.types import JSON
 from backend.database import Base
+from datetime import datetime
 
 class User(Base):
     __tablename__ = "users"
@@ -10,4 +12,17 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String)
     is_verified = Column(Boolean, default=False)
-    is_google_user = Column(Boolean, default=False)
\ No newline at end of file
+    is_google_user = Column(Boolean, default=False)
+
+class QuestionBankItem(Base):
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(String, index=True)  # Normalized role/position/type/languages key
+    role = Column(String, index=True)  # Candidate level, e.g. 'SE1'
+    position = Column(String, index=True)
+    question_type = Column(String, index=True)
+    languages = Column(String)
+    question = Column(JSON)
+    times_served = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from collections import Counter
+from typing import List, Optional
+
+from sqlalchemy import func
+
+from backend import metrics, model, schemas
+from backend.database import SessionLocal
+
+# Persisted bank of pre-generated questions. /generate-questions assembles a
+# set from here once the bucket is warm, i.e. holds at least
+# QUESTION_BANK_MIN_INVENTORY servable questions (and never fewer than the
+# set size), so a handful of deposits can't hand every caller the same set;
+# until then requests go through question_cache. The refill worker in
+# api/question_bank_refill.py keeps popular buckets stocked.
+
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+QUESTION_BANK_MIN_INVENTORY = int(os.getenv("QUESTION_BANK_MIN_INVENTORY", "30"))
+QUESTION_BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", "25"))
+
+# bucket -> number of requests seen by this worker, and a representative request
+_demand = Counter()
+_bucket_requests = {}
+
+
+def _normalize(value: str) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def bucket_for(request: schemas.InterviewRequest) -> Optional[str]:
+    """Bucket key for request, or None if it carries custom context the bank can't serve"""
+    if _normalize(request.other):
+        return None
+    languages = ",".join(sorted(
+        _normalize(lang) for lang in (request.languages or "").split(",") if lang.strip()
+    ))
+    return "|".join([
+        _normalize(request.role),
+        _normalize(request.position),
+        _normalize(request.questionType),
+        languages,
+    ])
+
+
+def _servable(db, bucket: str):
+    return db.query(model.QuestionBankItem).filter(
+        model.QuestionBankItem.bucket == bucket,
+        model.QuestionBankItem.times_served < QUESTION_BANK_MAX_SERVES,
+    )
+
+
+def _take(bucket: str, count: int) -> Optional[list]:
+    db = SessionLocal()
+    try:
+        if _servable(db, bucket).count() < max(QUESTION_BANK_MIN_INVENTORY, count):
+            return None
+        items = _servable(db, bucket).order_by(func.random()).limit(count).all()
+        if len(items) < count:
+            return None
+        for item in items:
+            item.times_served = (item.times_served or 0) + 1
+        db.commit()
+        return [item.question for item in items]
+    finally:
+        db.close()
+
+
+def _deposit(bucket: str, request: schemas.InterviewRequest, questions: list) -> int:
+    """Insert the questions the bucket doesn't already hold; returns how many were added"""
+    db = SessionLocal()
+    try:
+        existing = {
+            json.dumps(question, sort_keys=True)
+            for (question,) in db.query(model.QuestionBankItem.question)
+            .filter(model.QuestionBankItem.bucket == bucket)
+        }
+        new_questions = []
+        for question in questions:
+            fingerprint = json.dumps(question, sort_keys=True)
+            if fingerprint not in existing:
+                existing.add(fingerprint)
+                new_questions.append(question)
+        db.add_all([
+            model.QuestionBankItem(
+                bucket=bucket,
+                role=_normalize(request.role),
+                position=_normalize(request.position),
+                question_type=_normalize(request.questionType),
+                languages=_normalize(request.languages),
+                question=question,
+            )
+            for question in new_questions
+        ])
+        db.commit()
+        return len(new_questions)
+    finally:
+        db.close()
+
+
+def inventory(bucket: str) -> int:
+    db = SessionLocal()
+    try:
+        return _servable(db, bucket).count()
+    finally:
+        db.close()
+
+
+async def take(request: schemas.InterviewRequest) -> Optional[list]:
+    """Assemble a question set from the bank, or None if the bucket is cold"""
+    bucket = bucket_for(request)
+    if not QUESTION_BANK_ENABLED or bucket is None:
+        return None
+
+    _demand[bucket] += 1
+    _bucket_requests.setdefault(bucket, request)
+    try:
+        questions = await asyncio.to_thread(_take, bucket, request.numberOfQuestions)
+    except Exception as e:
+        print(f"Question bank lookup failed: {e}")
+        return None
+
+    metrics.increment("question_bank.hits" if questions is not None else "question_bank.misses")
+    return questions
+
+
+async def deposit(request: schemas.InterviewRequest, questions: List) -> int:
+    """Store freshly generated questions in the bank; returns how many were new"""
+    bucket = bucket_for(request)
+    if not QUESTION_BANK_ENABLED or bucket is None or not isinstance(questions, list):
+        return 0
+    try:
+        added = await asyncio.to_thread(_deposit, bucket, request, questions)
+    except Exception as e:
+        print(f"Question bank deposit failed: {e}")
+        return 0
+    metrics.increment("question_bank.deposited", added)
+    metrics.increment("question_bank.duplicates_skipped", len(questions) - added)
+    return added
+
+
+def popular_buckets(limit: int):
+    """Most requested buckets on this worker, with a representative request for each"""
+    return [(bucket, _bucket_requests[bucket]) for bucket, _ in _demand.most_common(limit)]
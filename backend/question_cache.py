@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+
+from backend import metrics, schemas
+from backend.shared_store import get_redis
+
+# Cache of generated question sets, keyed on the normalized InterviewRequest.
+# Each key keeps up to QUESTION_CACHE_VARIANTS separate generations; once that
+# many exist, requests are answered by sampling across them so repeat users
+# get a varied set without another LLM round trip. Concurrent misses for the
+# same key share one generation, and identical generations are stored once.
+
+QUESTION_CACHE_TTL_SECONDS = int(os.getenv("QUESTION_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+QUESTION_CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "1000"))
+QUESTION_CACHE_VARIANTS = int(os.getenv("QUESTION_CACHE_VARIANTS", "3"))
+
+_entries = OrderedDict()  # key -> (expires_at, generations)
+_inflight = {}  # key -> task generating and storing a set for it
+
+
+def _normalize(value: str) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def cache_key(kind: str, request: schemas.InterviewRequest) -> str:
+    languages = sorted(
+        _normalize(lang) for lang in (request.languages or "").split(",") if lang.strip()
+    )
+    parts = [
+        kind,
+        _normalize(request.role),
+        _normalize(request.position),
+        _normalize(request.questionType),
+        ",".join(languages),
+        _normalize(request.other),
+        str(request.numberOfQuestions),
+    ]
+    return "questions:" + hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _memory_get(key: str):
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    expires_at, generations = entry
+    if expires_at < time.time():
+        del _entries[key]
+        return None
+    _entries.move_to_end(key)
+    return generations
+
+
+def _memory_set(key: str, generations: list, expires_at: float = None):
+    _entries[key] = (expires_at or time.time() + QUESTION_CACHE_TTL_SECONDS, generations)
+    _entries.move_to_end(key)
+    while len(_entries) > QUESTION_CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+        metrics.increment("question_cache.evictions")
+
+
+async def _load(key: str) -> list:
+    generations = _memory_get(key)
+    if generations is not None:
+        return generations
+
+    client = get_redis()
+    if client is None:
+        return []
+    try:
+        raw = await client.get(key)
+        if raw is None:
+            return []
+        generations = json.loads(raw)
+        ttl = await client.ttl(key)
+        _memory_set(key, generations, time.time() + ttl if ttl and ttl > 0 else None)
+        metrics.increment("question_cache.shared_loads")
+        return generations
+    except Exception as e:
+        print(f"Question cache shared tier error: {e}")
+        return []
+
+
+def _fingerprint(questions: list) -> str:
+    """Content of a question set, ignoring order"""
+    return json.dumps(sorted(json.dumps(question, sort_keys=True) for question in questions))
+
+
+async def _store(key: str, questions: list):
+    generations = await _load(key)
+    if any(_fingerprint(generation) == _fingerprint(questions) for generation in generations):
+        # e.g. a coalesced upstream call returned the same set to several callers
+        metrics.increment("question_cache.duplicate_generations")
+        return
+    generations = (generations + [questions])[-QUESTION_CACHE_VARIANTS:]
+    _memory_set(key, generations)
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, json.dumps(generations), ex=QUESTION_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"Question cache shared tier error: {e}")
+
+
+def _sample(generations: list, count: int) -> list:
+    """Build a set by sampling questions across all cached generations"""
+    pool = {}
+    for generation in generations:
+        for question in generation:
+            pool.setdefault(json.dumps(question, sort_keys=True), question)
+    if len(pool) < count:
+        return random.choice(generations)
+    return random.sample(list(pool.values()), count)
+
+
+async def lookup(kind: str, request: schemas.InterviewRequest):
+    """Return a sampled cached question set for request, or None on a miss"""
+    generations = await _load(cache_key(kind, request))
+    if len(generations) >= QUESTION_CACHE_VARIANTS:
+        metrics.increment("question_cache.hits")
+        return _sample(generations, request.numberOfQuestions)
+    metrics.increment("question_cache.misses")
+    return None
+
+
+async def store(kind: str, request: schemas.InterviewRequest, questions):
+    """Add a freshly generated question set to the cache"""
+    if isinstance(questions, list) and questions:
+        await _store(cache_key(kind, request), questions)
+
+
+async def get_or_generate(kind: str, request: schemas.InterviewRequest, generate):
+    """Return a cached question set for request, calling generate() on a miss.
+
+    Concurrent misses for the same key wait on a single generate() call.
+    """
+    questions = await lookup(kind, request)
+    if questions is not None:
+        return questions
+
+    key = cache_key(kind, request)
+    task = _inflight.get(key)
+    if task is not None:
+        metrics.increment("question_cache.coalesced")
+    else:
+        async def generate_and_store():
+            questions = await generate()
+            await store(kind, request, questions)
+            return questions
+
+        # Own task, so one caller disconnecting doesn't cancel it for the others
+        task = asyncio.ensure_future(generate_and_store())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _finish_flight(key, t))
+    return await asyncio.shield(task)
+
+
+def _finish_flight(key: str, task: asyncio.Task):
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # Mark as retrieved even if every caller went away
+
+
+def stats() -> dict:
+    return {
+        "entries": len(_entries),
+        "max_entries": QUESTION_CACHE_MAX_ENTRIES,
+        "variants": QUESTION_CACHE_VARIANTS,
+        "shared_tier": get_redis() is not None,
+    }
+
+
+metrics.register_source("question_cache", stats)
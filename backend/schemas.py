@@ -54,6 +54,7 @@ class InterviewRequest(BaseModel):
 class EvaluateRequest(BaseModel):
     questions: List[Union[str, dict]]
     answers: List[str]
+    explain: bool = False  # Ask the LLM to explain locally graded MCQs
 
 
 class LanguageAnalysis(BaseModel):
@@ -82,6 +83,7 @@ class VoiceAnswerResponse(BaseModel):
     score: float
     feedback: str
     follow_up_question: Optional[str] = None
+    speech_ratio: Optional[float] = None  # Fraction of the recording containing speech
 
 class VoiceInterviewEvaluationRequest(BaseModel):
     evaluations: List[VoiceAnswerResponse]
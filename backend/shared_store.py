@@ -0,0 +1,20 @@
+import os
+
+# Optional shared key-value tier (Redis). Everything that uses it must keep
+# working when REDIS_URL is unset or the redis package is not installed.
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide Redis client, or None when no shared tier is configured"""
+    global _client
+    if _client is None and REDIS_URL and redis is not None:
+        _client = redis.from_url(REDIS_URL)
+    return _client
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Allow `from backend import ...` however pytest is invoked
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+# The backend package creates its database engine on import; tests never touch
+# the real database.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'backend-tests.db')}")
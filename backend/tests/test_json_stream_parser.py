@@ -0,0 +1,59 @@
+from backend.api.json_stream_parser import JSONArrayStreamParser
+
+QUESTIONS = '[{"question": "Why [brackets] \\"here\\"?", "tags": ["a", "b"]}, {"question": "Next"}]'
+
+def feed_chunks(text: str, size: int):
+    parser = JSONArrayStreamParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return parser, items
+
+def test_plain_array():
+    parser, items = feed_chunks(QUESTIONS, len(QUESTIONS))
+    assert items == [{"question": 'Why [brackets] "here"?', "tags": ["a", "b"]}, {"question": "Next"}]
+    assert parser.done
+
+def test_every_chunk_split():
+    expected = feed_chunks(QUESTIONS, len(QUESTIONS))[1]
+    for size in range(1, 12):
+        parser, items = feed_chunks(QUESTIONS, size)
+        assert items == expected, size
+        assert parser.done
+
+def test_escapes_split_across_chunks():
+    parser = JSONArrayStreamParser()
+    items = parser.feed('["a \\')
+    items += parser.feed('" b", "c\\\\')
+    items += parser.feed('"]')
+    assert items == ['a " b', "c\\"]
+
+def test_preamble_with_brackets_is_skipped():
+    text = "Sure! Here are [5] questions (see [notes]):\n" + QUESTIONS
+    for size in (1, 3, len(text)):
+        _, items = feed_chunks(text, size)
+        assert [item["question"] for item in items] == ['Why [brackets] "here"?', "Next"]
+
+def test_json_fence_anchors_the_array():
+    text = "Questions [draft]:\n```json\n" + QUESTIONS + "\n```"
+    for size in (1, 5, len(text)):
+        parser, items = feed_chunks(text, size)
+        assert len(items) == 2
+        assert parser.done
+
+def test_string_elements():
+    _, items = feed_chunks('Output: ["What is X?", "Explain [Y]."]', 4)
+    assert items == ["What is X?", "Explain [Y]."]
+
+def test_truncated_output_keeps_complete_elements():
+    truncated = QUESTIONS[:QUESTIONS.index('"Next"') + 3]
+    for size in (1, 7, len(truncated)):
+        parser, items = feed_chunks(truncated, size)
+        assert len(items) == 1
+        assert not parser.done
+
+def test_nothing_before_the_array_starts():
+    parser = JSONArrayStreamParser()
+    assert parser.feed("Thinking about [it") == []
+    assert parser.feed("]... ") == []
+    assert parser.feed('[{"q": 1}]') == [{"q": 1}]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from backend.compony_api import proctoring_state
+from backend.compony_api.proctoring import ProctoringSession
+from backend.compony_api.proctoring_state import MemorySessionStateStore, RedisSessionStateStore
+
+class LocalRedis:
+    """Stand-in for redis.asyncio with the get/set(ex=...) the store uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.now = 0.0
+
+    async def get(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.now:
+            del self.values[key]
+            return None
+        return value
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = (value.encode(), self.now + ex if ex else None)
+
+def test_redis_store_round_trip_with_ttl():
+    client = LocalRedis()
+    store = RedisSessionStateStore(client, ttl_seconds=60)
+    state = {"last_face_detection_time": 1.5, "last_email_sent_time": 0, "face_detected": None}
+
+    async def scenario():
+        assert await store.load("abc") is None
+        await store.save("abc", state)
+        assert "proctoring:state:abc" in client.values
+        assert await store.load("abc") == state
+        client.now += 61
+        assert await store.load("abc") is None
+
+    asyncio.run(scenario())
+
+def test_memory_store_expires_and_sweeps(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(proctoring_state.time, "monotonic", lambda: now[0])
+    store = MemorySessionStateStore(ttl_seconds=10)
+
+    async def scenario():
+        await store.save("a", {"x": 1})
+        assert await store.load("a") == {"x": 1}
+        now[0] += 11
+        assert await store.load("a") is None
+
+        await store.save("b", {"x": 2})
+        now[0] += store.SWEEP_INTERVAL_SECONDS
+        await store.save("c", {"x": 3})  # Sweeps "b", which was never loaded again
+        assert set(store.states) == {"c"}
+
+    asyncio.run(scenario())
+
+def test_reconnect_resumes_timers():
+    store = MemorySessionStateStore()
+
+    async def scenario():
+        first = ProctoringSession(None, "interview", lambda screenshot: None, store)
+        first.last_face_detection_time = 123.0
+        first.last_email_sent_time = 456.0
+        await first.save_state(force=True, claim=True)
+
+        second = ProctoringSession(None, "interview", lambda screenshot: None, store)
+        assert await second.resume_state()
+        assert (second.last_face_detection_time, second.last_email_sent_time) == (123.0, 456.0)
+
+    asyncio.run(scenario())
+
+def test_superseded_session_does_not_overwrite_state():
+    store = RedisSessionStateStore(LocalRedis())
+
+    async def scenario():
+        old = ProctoringSession(None, "interview", lambda screenshot: None, store)
+        old.last_face_detection_time = 100.0
+        await old.save_state(force=True, claim=True)
+
+        new = ProctoringSession(None, "interview", lambda screenshot: None, store)
+        await new.resume_state()
+        new.last_face_detection_time = time.time()
+        await new.save_state(force=True, claim=True)
+
+        # The old connection finishes closing after the new one took over
+        old.last_email_sent_time = 999.0
+        await old.save_state(force=True)
+        assert old.superseded
+
+        saved = await store.load("interview")
+        assert saved["owner"] == new.token
+        assert saved["last_face_detection_time"] == new.last_face_detection_time
+        assert saved["last_email_sent_time"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import llm, model, question_bank, schemas
+from backend.api import question_bank_refill
+
+REQUEST = schemas.InterviewRequest(
+    role="SE1", position="Backend", languages="python", other="", numberOfQuestions=3,
+)
+
+@pytest.fixture
+def bank(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bank.db'}")
+    model.QuestionBankItem.__table__.create(engine)
+    monkeypatch.setattr(question_bank, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(question_bank, "QUESTION_BANK_MIN_INVENTORY", 6)
+    return question_bank.bucket_for(REQUEST)
+
+def questions(prefix, count):
+    return [{"question": f"{prefix}-q{i}", "options": [], "answer": ""} for i in range(count)]
+
+def test_bank_serves_only_once_stocked_past_minimum(bank):
+    async def scenario():
+        assert await question_bank.deposit(REQUEST, questions("g1", 3)) == 3
+        # One generated set is not a warm bucket; it would be served back every time
+        assert await question_bank.take(REQUEST) is None
+        assert await question_bank.deposit(REQUEST, questions("g2", 3)) == 3
+        served = await question_bank.take(REQUEST)
+        assert len(served) == 3
+
+    asyncio.run(scenario())
+
+def test_deposit_counts_only_new_questions(bank):
+    async def scenario():
+        assert await question_bank.deposit(REQUEST, questions("g1", 3)) == 3
+        assert await question_bank.deposit(REQUEST, questions("g1", 4)) == 1
+
+    asyncio.run(scenario())
+
+def test_refill_stops_below_minimum_on_duplicate_batches(bank, monkeypatch):
+    calls = []
+
+    async def generate_text(prompt):
+        calls.append(prompt)
+        return "[]"
+
+    monkeypatch.setattr(llm, "generate_text", generate_text)
+    monkeypatch.setattr(llm, "extract_json", lambda text: questions("same", 4))
+
+    asyncio.run(question_bank_refill.refill_bucket(bank, REQUEST))
+    # The second batch added nothing, so the refill gives up instead of counting it
+    assert len(calls) == 2
+    assert question_bank.inventory(bank) == 4
@@ -0,0 +1,78 @@
+import asyncio
+
+from fastapi import WebSocketDisconnect
+
+from backend import llm, schemas
+from backend.api import voice_interview_session as voice
+
+class ScriptedWebSocket:
+    """Plays back client messages and records what the server sends"""
+
+    def __init__(self, start, messages):
+        self.start = start
+        self.messages = list(messages)
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def receive_json(self):
+        return self.start
+
+    async def receive(self):
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return self.messages.pop(0)
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        self.closed = True
+
+def text(data):
+    return {"type": "websocket.receive", "text": data}
+
+def test_failed_turn_keeps_the_session_and_the_answer(monkeypatch):
+    transcribed = []
+    evaluations = [RuntimeError("Gemini timed out"), {"score": 7, "feedback": "Good", "follow_up_question": None}]
+
+    async def transcribe_audio_async(audio):
+        transcribed.append(audio)
+        return {"text": "my answer", "speech_ratio": 0.9}
+
+    async def evaluate_voice_answer(*args):
+        result = evaluations.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def build_interview_evaluation(request):
+        scores = [{"name": question, "score": answer.score} for question, answer in zip(request.questions, request.evaluations)]
+        return schemas.VoiceInterviewEvaluationResponse(
+            overall_score=7, overall_feedback="Good", question_scores=scores, recommendations=[],
+        )
+
+    monkeypatch.setattr(llm, "is_configured", lambda: True)
+    monkeypatch.setattr(voice, "VOICE_SESSION_PARTIALS", False)
+    monkeypatch.setattr(voice, "transcribe_audio_async", transcribe_audio_async)
+    monkeypatch.setattr(voice, "evaluate_voice_answer", evaluate_voice_answer)
+    monkeypatch.setattr(voice, "build_interview_evaluation", build_interview_evaluation)
+
+    websocket = ScriptedWebSocket({"type": "start", "questions": ["Q1"], "tts": False}, [
+        {"type": "websocket.receive", "bytes": b"audio"},
+        text('{"type": "answer_end"'),  # Malformed control frame
+        text('{"type": "answer_end"}'),  # Evaluation fails
+        text('{"type": "answer_end"}'),  # Resent; succeeds with the same audio
+    ])
+    asyncio.run(voice.voice_interview_session(websocket))
+
+    types = [message["type"] for message in websocket.sent]
+    assert types == ["question", "error", "transcript", "error", "evaluation", "summary"]
+    assert transcribed == [b"audio"]  # Transcribed once, reused on the retry
+    assert websocket.sent[-1]["question_scores"] == [{"name": "Q1", "score": 7.0}]
+    assert websocket.closed
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from backend import metrics
+
+# Content-addressed cache of synthesized speech. Audio is keyed on a hash of
+# (text, lang, tld), so the same question read to every candidate (and every
+# retry) is synthesized once. A byte-bounded in-memory LRU sits in front of a
+# size-bounded on-disk LRU; disk recency is tracked with file mtimes.
+
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ai-interviewer-tts"))
+
+_memory = OrderedDict()  # key -> mp3 bytes
+_memory_bytes = 0
+_disk_bytes = None  # Computed on first disk access
+_disk_lock = threading.Lock()
+_inflight = {}  # key -> Future, so concurrent misses synthesize once
+
+
+def cache_key(text: str, lang: str = "en", tld: str = "com") -> str:
+    return hashlib.sha256(f"{lang}|{tld}|{text.strip()}".encode("utf-8")).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"{key[:32]}"'
+
+
+def _memory_get(key: str):
+    audio = _memory.get(key)
+    if audio is not None:
+        _memory.move_to_end(key)
+    return audio
+
+
+def _memory_set(key: str, audio: bytes):
+    global _memory_bytes
+    if len(audio) > TTS_CACHE_MEMORY_BYTES:
+        return
+    if key in _memory:
+        _memory_bytes -= len(_memory.pop(key))
+    _memory[key] = audio
+    _memory_bytes += len(audio)
+    while _memory_bytes > TTS_CACHE_MEMORY_BYTES:
+        _, evicted = _memory.popitem(last=False)
+        _memory_bytes -= len(evicted)
+        metrics.increment("tts_cache.memory_evictions")
+
+
+def _path(key: str) -> str:
+    return os.path.join(TTS_CACHE_DIR, key[:2], f"{key}.mp3")
+
+
+def _disk_files() -> list:
+    files = []
+    for root, _, names in os.walk(TTS_CACHE_DIR):
+        for name in names:
+            if name.endswith(".mp3"):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def _ensure_disk_size():
+    global _disk_bytes
+    if _disk_bytes is None:
+        _disk_bytes = sum(size for _, size, _ in _disk_files())
+
+
+def _disk_get(key: str):
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            audio = f.read()
+        os.utime(path)  # Mark as recently used
+        return audio
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"TTS cache disk read error: {e}")
+        return None
+
+
+def _disk_set(key: str, audio: bytes):
+    global _disk_bytes
+    path = _path(key)
+    try:
+        with _disk_lock:
+            _ensure_disk_size()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            existing = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            _disk_bytes += len(audio) - existing
+            if _disk_bytes > TTS_CACHE_DISK_BYTES:
+                _evict_disk()
+    except OSError as e:
+        print(f"TTS cache disk write error: {e}")
+
+
+def _evict_disk():
+    """Delete least recently used files until the cache is back under 90% of its limit"""
+    global _disk_bytes
+    files = sorted(_disk_files())
+    _disk_bytes = sum(size for _, size, _ in files)
+    target = TTS_CACHE_DISK_BYTES * 0.9
+    for _, size, path in files:
+        if _disk_bytes <= target:
+            break
+        try:
+            os.remove(path)
+            _disk_bytes -= size
+            metrics.increment("tts_cache.disk_evictions")
+        except FileNotFoundError:
+            pass
+
+
+async def _synthesize_and_store(key: str, synthesize) -> bytes:
+    audio = await synthesize()
+    _memory_set(key, audio)
+    await asyncio.to_thread(_disk_set, key, audio)
+    return audio
+
+
+async def get_or_synthesize(text: str, lang: str, tld: str, synthesize):
+    """Return (key, mp3 bytes) for text, calling synthesize() only on a miss in both tiers"""
+    key = cache_key(text, lang, tld)
+    audio = _memory_get(key)
+    if audio is not None:
+        metrics.increment("tts_cache.memory_hits")
+        return key, audio
+
+    audio = await asyncio.to_thread(_disk_get, key)
+    if audio is not None:
+        metrics.increment("tts_cache.disk_hits")
+        _memory_set(key, audio)
+        return key, audio
+
+    future = _inflight.get(key)
+    if future is None:
+        metrics.increment("tts_cache.misses")
+        future = asyncio.ensure_future(_synthesize_and_store(key, synthesize))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        metrics.increment("tts_cache.shared_inflight")
+    return key, await asyncio.shield(future)
+
+
+def stats() -> dict:
+    return {
+        "memory_entries": len(_memory),
+        "memory_bytes": _memory_bytes,
+        "memory_limit_bytes": TTS_CACHE_MEMORY_BYTES,
+        "disk_bytes": _disk_bytes,
+        "disk_limit_bytes": TTS_CACHE_DISK_BYTES,
+        "disk_dir": TTS_CACHE_DIR,
+    }
+
+
+metrics.register_source("tts_cache", stats)
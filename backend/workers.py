@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend import metrics
+
+# Bounded executor pools for blocking or CPU-heavy work (audio decoding,
+# speech recognition, frame analysis) so it never runs on the event loop.
+
+# Process pools start workers from a clean forkserver by default: forking the
+# server process directly can deadlock once OpenCV or executor threads exist.
+WORKER_START_METHOD = os.getenv("WORKER_START_METHOD", "forkserver")
+
+_pools = []
+
+
+class PoolBusyError(Exception):
+    """Raised when a pool's backlog is already at its configured limit"""
+
+
+class WorkerPool:
+    def __init__(self, name: str, size: int, kind: str = "thread", max_queue: int = None, initializer=None):
+        self.name = name
+        self.size = max(1, size)
+        self.kind = kind
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_duration_ms = 0.0
+        self._executor = None
+        _pools.append(self)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size, initializer=self.initializer,
+                    mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size, thread_name_prefix=self.name, initializer=self.initializer
+                )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.size)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result"""
+        if self.max_queue is not None and self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise PoolBusyError(f"{self.name} pool is busy ({self.queue_depth} jobs queued)")
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        started = time.monotonic()
+        try:
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+            self.last_duration_ms = round((time.monotonic() - started) * 1000, 1)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "size": self.size,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "last_duration_ms": self.last_duration_ms,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def shutdown_pools():
+    for pool in _pools:
+        pool.shutdown()
+
+
+metrics.register_source("worker_pools", lambda: {pool.name: pool.stats() for pool in _pools})
@@ -6,6 +6,7 @@ import toast from 'react-hot-toast';
 import Lottie from "lottie-react";
 import GhostAnimation from "../assets/images/Ghost.json";
 import { API_URL, WS_URL } from '../config';
+import { DEFAULT_FRAME_CONFIG, frameIntervalMs, sendFrame } from '../proctoring';
 
 const CompanyVoiceInterview = () => {
     const { interviewId } = useParams();
@@ -124,7 +125,15 @@ const CompanyVoiceInterview = () => {
         let reconnectAttempts = 0;
         const MAX_RECONNECT_ATTEMPTS = 5;
         const canvas = document.createElement('canvas');
-        const ctx = canvas.getContext('2d');
+        const ctx = canvas.getContext('2d', { willReadFrequently: true });
+        let frameConfig = DEFAULT_FRAME_CONFIG;
+
+        const startCapture = () => {
+            if (intervalId) clearInterval(intervalId);
+            intervalId = setInterval(() => {
+                sendFrame(ws, videoRef.current, canvas, ctx, frameConfig);
+            }, frameIntervalMs(frameConfig));
+        };
 
         const connectWS = () => {
             if (reconnectAttempts >= MAX_RECONNECT_ATTEMPTS) {
@@ -138,31 +147,18 @@ const CompanyVoiceInterview = () => {
             ws.onopen = () => {
                 console.log('WebSocket connection established for detection.');
                 reconnectAttempts = 0;
-
-                if (intervalId) clearInterval(intervalId);
-                intervalId = setInterval(() => {
-                    if (videoRef.current && ws.readyState === WebSocket.OPEN) {
-                        const targetWidth = 640;
-                        const targetHeight = (videoRef.current.videoHeight / videoRef.current.videoWidth) * targetWidth;
-                        canvas.width = targetWidth;
-                        canvas.height = targetHeight;
-
-                        if (canvas.width > 0 && canvas.height > 0) {
-                            ctx.drawImage(videoRef.current, 0, 0, targetWidth, targetHeight);
-                            canvas.toBlob((blob) => {
-                                if (blob && ws.readyState === WebSocket.OPEN) {
-                                    ws.send(blob);
-                                }
-                            }, 'image/jpeg', 0.8);
-                        }
-                    }
-                }, 1000); // 1 FPS
+                frameConfig = DEFAULT_FRAME_CONFIG;
+                startCapture();
             };
 
             ws.onmessage = (event) => {
                 try {
                     const data = JSON.parse(event.data);
-                    if (data.status === 'active') {
+                    if (data.type === 'config') {
+                        // Server-requested frame format, size and rate
+                        frameConfig = { ...DEFAULT_FRAME_CONFIG, ...data };
+                        startCapture();
+                    } else if (data.status === 'active') {
                         setFaceDetected(data.face_detected);
                     }
                 } catch (e) {
@@ -240,18 +236,19 @@ const CompanyVoiceInterview = () => {
     useEffect(() => {
         if (questions.length > 0 && currentQuestionIndex === 0 && !loading) {
             // Small delay to ensure everything is ready
-            setTimeout(() => speakQuestion(questions[0]), 1000);
+            setTimeout(() => speakQuestion(0), 1000);
         }
     }, [questions, loading]);
 
     // Google TTS Function with Fallback
-    const speakQuestion = async (text) => {
+    const speakQuestion = async (index) => {
+        const text = questions[index];
         if (isSpeaking) return;
         setIsSpeaking(true);
 
         try {
-            // Try gTTS (using localhost)
-            const response = await axios.post(`${API_URL}/tts`, { text }, {
+            // Audio is pre-rendered when the interview is created
+            const response = await axios.get(`${API_URL}/tts/interview/${interviewId}/${index}`, {
                 responseType: 'blob'
             });
 
@@ -355,7 +352,7 @@ const CompanyVoiceInterview = () => {
             setCurrentQuestionIndex(prev => prev + 1);
             setTranscript('');
             // Speak next question
-            setTimeout(() => speakQuestion(questions[currentQuestionIndex + 1]), 500);
+            setTimeout(() => speakQuestion(currentQuestionIndex + 1), 500);
         } else {
             // Submit Interview
             setProcessingAnswer(true);
@@ -485,7 +482,7 @@ const CompanyVoiceInterview = () => {
                     </div>
 
                     <div className="mt-6 text-center">
-                        <button onClick={() => speakQuestion(questions[currentQuestionIndex])} disabled={isSpeaking || isListening} className="text-sm text-[#6B6662] hover:text-[#1A1817] underline">
+                        <button onClick={() => speakQuestion(currentQuestionIndex)} disabled={isSpeaking || isListening} className="text-sm text-[#6B6662] hover:text-[#1A1817] underline">
                             Repeat Question
                         </button>
                     </div>
@@ -3,6 +3,7 @@ import { useLocation, useNavigate, useParams } from 'react-router-dom';
 import axios from 'axios';
 import { Loader } from 'lucide-react';
 import { API_URL, WS_URL } from '../config';
+import { DEFAULT_FRAME_CONFIG, frameIntervalMs, sendFrame } from '../proctoring';
 
 const Interview = () => {
   const location = useLocation();
@@ -57,7 +58,15 @@ const Interview = () => {
     let reconnectAttempts = 0;
     const MAX_RECONNECT_ATTEMPTS = 5;
     const canvas = document.createElement('canvas');
-    const ctx = canvas.getContext('2d');
+    const ctx = canvas.getContext('2d', { willReadFrequently: true });
+    let frameConfig = DEFAULT_FRAME_CONFIG;
+
+    const startCapture = () => {
+      if (intervalId) clearInterval(intervalId);
+      intervalId = setInterval(() => {
+        sendFrame(ws, videoRef.current, canvas, ctx, frameConfig);
+      }, frameIntervalMs(frameConfig));
+    };
 
     const connectWS = () => {
       if (reconnectAttempts >= MAX_RECONNECT_ATTEMPTS) {
@@ -73,31 +82,18 @@ const Interview = () => {
         console.log('WebSocket connection established.');
         setEyeTrackingStatus('Eye-tracking is active.');
         reconnectAttempts = 0;
-
-        if (intervalId) clearInterval(intervalId);
-        intervalId = setInterval(() => {
-          if (videoRef.current && ws.readyState === WebSocket.OPEN) {
-            const targetWidth = 640;
-            const targetHeight = (videoRef.current.videoHeight / videoRef.current.videoWidth) * targetWidth;
-            canvas.width = targetWidth;
-            canvas.height = targetHeight;
-
-            if (canvas.width > 0 && canvas.height > 0) {
-              ctx.drawImage(videoRef.current, 0, 0, targetWidth, targetHeight);
-              canvas.toBlob((blob) => {
-                if (blob && ws.readyState === WebSocket.OPEN) {
-                  ws.send(blob);
-                }
-              }, 'image/jpeg', 0.8);
-            }
-          }
-        }, 1000);
+        frameConfig = DEFAULT_FRAME_CONFIG;
+        startCapture();
       };
 
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          if (data.status === 'active') {
+          if (data.type === 'config') {
+            // Server-requested frame format, size and rate
+            frameConfig = { ...DEFAULT_FRAME_CONFIG, ...data };
+            startCapture();
+          } else if (data.status === 'active') {
             setEyeTrackingStatus(data.face_detected ? 'Eye-tracking is active.' : 'Warning: Face not detected!');
           }
         } catch (e) {
@@ -0,0 +1,36 @@
+// Frame capture for the proctoring WebSocket. On connect the server sends
+// {type: 'config', format, width, fps[, quality]}; until then (or with an
+// older server) frames go out as 640px JPEGs at 1 fps.
+export const DEFAULT_FRAME_CONFIG = { format: 'jpeg', width: 640, fps: 1, quality: 0.8 };
+
+const GRAY8_MAGIC = [0x47, 0x38]; // 'G8'
+
+export const frameIntervalMs = (config) => 1000 / (config.fps > 0 ? config.fps : DEFAULT_FRAME_CONFIG.fps);
+
+export const sendFrame = (ws, video, canvas, ctx, config) => {
+  if (!video || !video.videoWidth || ws.readyState !== WebSocket.OPEN) return;
+
+  const width = config.width;
+  const height = Math.round((video.videoHeight / video.videoWidth) * width);
+  canvas.width = width;
+  canvas.height = height;
+  ctx.drawImage(video, 0, 0, width, height);
+
+  if (config.format === 'gray8') {
+    // 'G8' header, then raw 8-bit grayscale rows; the server infers the height
+    const { data } = ctx.getImageData(0, 0, width, height);
+    const gray = new Uint8Array(GRAY8_MAGIC.length + width * height);
+    gray.set(GRAY8_MAGIC);
+    for (let i = 0, j = GRAY8_MAGIC.length; j < gray.length; i += 4, j++) {
+      gray[j] = (data[i] * 77 + data[i + 1] * 150 + data[i + 2] * 29) >> 8; // BT.601 luma
+    }
+    ws.send(gray);
+    return;
+  }
+
+  canvas.toBlob((blob) => {
+    if (blob && ws.readyState === WebSocket.OPEN) {
+      ws.send(blob);
+    }
+  }, 'image/jpeg', config.quality);
+};